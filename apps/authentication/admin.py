@@ -6,15 +6,29 @@ Accessible sur : http://127.0.0.1:8000/admin/
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Value
+from django.db.models.functions import Concat, Trim
+
 from .models import User, MFADevice, UserSession
 
 
+class MFADeviceInline(admin.TabularInline):
+    """Dispositifs MFA affichés directement sur la fiche utilisateur."""
+    model           = MFADevice
+    extra           = 0
+    fields          = ['device_type', 'name', 'is_verified', 'is_primary', 'last_used']
+    readonly_fields = ['last_used']
+
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     """Interface admin pour le modèle User personnalisé."""
 
     list_display  = ['email', 'full_name', 'role', 'is_active', 'mfa_enabled', 'date_joined']
     list_filter   = ['role', 'is_active', 'mfa_enabled', 'electrical_certified']
+    # Pas de facettes (Django 5) : évite un COUNT par valeur de filtre
+    # à chaque affichage de la changelist
+    show_facets   = admin.ShowFacets.NEVER
     search_fields = ['email', 'first_name', 'last_name']
     ordering      = ['-date_joined']
 
@@ -37,19 +51,41 @@ class UserAdmin(BaseUserAdmin):
 
     # Nécessaire car on utilise email et non username
     filter_horizontal = ('groups', 'user_permissions')
+    inlines           = [MFADeviceInline]
+
+    def get_queryset(self, request):
+        # Le nom complet est concaténé en SQL plutôt que via la @property
+        # Python appelée pour chaque ligne de la changelist (et triable).
+        # Pas de prefetch des dispositifs MFA : la changelist ne les
+        # affiche pas et l'inline du formulaire fait sa propre requête.
+        return super().get_queryset(request).annotate(
+            _full_name=Trim(Concat('first_name', Value(' '), 'last_name'))
+        )
+
+    @admin.display(description="Nom complet", ordering='_full_name')
+    def full_name(self, obj):
+        return obj._full_name or obj.email
 
 
 @admin.register(MFADevice)
 class MFADeviceAdmin(admin.ModelAdmin):
     list_display  = ['user', 'device_type', 'name', 'is_verified', 'is_primary', 'last_used']
     list_filter   = ['device_type', 'is_verified', 'is_primary']
+    show_facets   = admin.ShowFacets.NEVER
     search_fields = ['user__email']
     readonly_fields = ['secret_key']  # Ne jamais afficher en clair
+    # Joindre le User en une seule requête (évite le N+1 sur la changelist)
+    list_select_related = ('user',)
+    # Recherche AJAX paginée au lieu du <select> chargeant tous les Users
+    autocomplete_fields = ['user']
 
 
 @admin.register(UserSession)
 class UserSessionAdmin(admin.ModelAdmin):
     list_display  = ['user', 'ip_address', 'is_active', 'created_at', 'logged_out_at']
     list_filter   = ['is_active']
+    show_facets   = admin.ShowFacets.NEVER
     search_fields = ['user__email', 'ip_address']
-    readonly_fields = ['user', 'ip_address', 'user_agent', 'created_at']
\ No newline at end of file
+    readonly_fields = ['user', 'ip_address', 'user_agent', 'created_at']
+    list_select_related = ('user',)
+    autocomplete_fields = ['user']
\ No newline at end of file
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.17 on 2026-08-31 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mfadevice',
+            index=models.Index(fields=['user', 'is_primary'], name='authenticat_user_id_69d516_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role'], name='authenticat_role_7fb088_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['locked_until'], name='authenticat_locked__7f1bef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['user', 'is_active'], name='authenticat_user_id_f427c8_idx'),
+        ),
+    ]
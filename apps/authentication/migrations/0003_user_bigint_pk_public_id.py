@@ -0,0 +1,144 @@
+"""
+Remplace la PK UUID du User par une BigAutoField + UUID public secondaire.
+
+Les UUID v4 aléatoires en clé primaire fragmentent le B-tree à chaque
+INSERT et gonflent tous les index FK (16 octets au lieu de 8). La PK
+redevient un entier auto-incrémenté ; l'ancien UUID est conservé dans
+public_id (unique, indexé) pour tout ce qui est exposé à l'extérieur.
+
+Le changement de type de PK ne peut pas convertir les valeurs en place
+sur SQLite : les utilisateurs sont mis de côté puis réinsérés après le
+swap avec public_id = ancien id. Supprimer les User ferait en cascade
+disparaître leurs équipements MFA, sessions et lignes de groupes, et
+mettrait à NULL tous les responsables/auteurs des autres apps : toutes
+les références vers User sont donc également mises de côté, puis
+rebranchées via la table ancien UUID → nouvelle PK.
+"""
+
+import uuid
+
+from django.db import migrations, models
+
+# Lignes mises de côté entre les RunPython. La migration est atomique :
+# les opérations s'exécutent dans le même processus et la même
+# transaction, un échec en cours de route annule aussi la suppression.
+_STASH = {}
+
+
+def _user_references(apps):
+    """
+    Itère tous les couples (modèle, champ FK) pointant vers User dans
+    l'état du projet, tables m2m auto-créées comprises (groupes et
+    permissions de l'utilisateur).
+    """
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.label == 'authentication.User':
+            continue
+        for field in model._meta.local_fields:
+            if (
+                field.is_relation
+                and field.related_model is not None
+                and field.related_model._meta.label == 'authentication.User'
+            ):
+                yield model, field
+
+
+def stash_users(apps, schema_editor):
+    """
+    Met de côté les utilisateurs ET tout ce qui les référence avant le
+    changement de type de PK.
+    """
+    User = apps.get_model('authentication', 'User')
+
+    _STASH['users']    = list(User.objects.all().values())
+    _STASH['cascades'] = []   # (label, attname, lignes complètes)
+    _STASH['setnulls'] = []   # (label, attname, {ancien user_id: [pks]})
+
+    for model, field in _user_references(apps):
+        attname    = field.attname
+        referenced = model.objects.exclude(**{f'{attname}__isnull': True})
+
+        if field.remote_field.on_delete is models.CASCADE:
+            # Lignes détruites par la suppression des User : stockées
+            # entières pour réinsertion (MFA, sessions, m2m groupes)
+            rows = list(referenced.values())
+            if rows:
+                _STASH['cascades'].append((model._meta.label, attname, rows))
+        else:
+            # SET_NULL : les lignes survivent mais perdent la référence,
+            # on ne garde que de quoi la rétablir
+            refs = {}
+            for pk, user_id in referenced.values_list('pk', attname):
+                refs.setdefault(user_id, []).append(pk)
+            if refs:
+                _STASH['setnulls'].append((model._meta.label, attname, refs))
+
+    User.objects.all().delete()
+
+
+def restore_users(apps, schema_editor):
+    """
+    Réinsère les utilisateurs avec public_id = ancien id, puis rebranche
+    toutes les références mises de côté sur les nouvelles PK entières.
+    """
+    User = apps.get_model('authentication', 'User')
+
+    pk_map = {}
+    for row in _STASH.get('users', []):
+        old_id = row.pop('id')
+        row['public_id'] = old_id
+        user = User.objects.create(**row)
+        pk_map[old_id] = user.pk
+
+    for label, attname, rows in _STASH.get('cascades', []):
+        model = apps.get_model(label)
+        for row in rows:
+            row[attname] = pk_map[row[attname]]
+            model.objects.create(**row)
+
+    for label, attname, refs in _STASH.get('setnulls', []):
+        model = apps.get_model(label)
+        for old_id, pks in refs.items():
+            model.objects.filter(pk__in=pks).update(
+                **{attname: pk_map[old_id]}
+            )
+
+    _STASH.clear()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_mfadevice_authenticat_user_id_69d516_idx_and_more'),
+        # Les modèles qui référencent User doivent exister dans l'état
+        # du projet pour que _user_references les voie
+        ('devices', '0001_initial'),
+        ('cable_routing', '0001_initial'),
+        ('connections', '0001_initial'),
+        ('schematics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(stash_users, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.BigAutoField(
+                auto_created=True,
+                primary_key=True,
+                serialize=False,
+                verbose_name='ID',
+            ),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='public_id',
+            field=models.UUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                unique=True,
+                verbose_name='Identifiant public',
+            ),
+        ),
+        migrations.RunPython(restore_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+"""
+Convertit User.role du varchar(20) vers un entier ordonné par privilège.
+
+0=viewer, 1=technician, 2=engineer, 3=admin — voir core/constants.py.
+Les anciennes valeurs texte sont réécrites en chiffres avant le
+changement de type de colonne (SQLite convertit '3' → 3 à la
+reconstruction de la table grâce à l'affinité INTEGER).
+"""
+
+from django.db import migrations, models
+
+_ROLE_MAP = {
+    'viewer'    : '0',
+    'technician': '1',
+    'engineer'  : '2',
+    'admin'     : '3',
+}
+
+
+def roles_to_int(apps, schema_editor):
+    User = apps.get_model('authentication', 'User')
+    for old, new in _ROLE_MAP.items():
+        User.objects.filter(role=old).update(role=new)
+
+
+def roles_to_str(apps, schema_editor):
+    User = apps.get_model('authentication', 'User')
+    for old, new in _ROLE_MAP.items():
+        User.objects.filter(role=new).update(role=old)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_user_bigint_pk_public_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(roles_to_int, roles_to_str),
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, 'Lecteur'),
+                    (1, 'Technicien'),
+                    (2, 'Ingénieur'),
+                    (3, 'Administrateur'),
+                ],
+                default=0,
+                verbose_name='Rôle',
+            ),
+        ),
+    ]
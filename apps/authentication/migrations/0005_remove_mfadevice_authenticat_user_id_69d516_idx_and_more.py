@@ -0,0 +1,21 @@
+# Generated by Django 5.2.17 on 2026-08-31 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_user_role_integer'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mfadevice',
+            name='authenticat_user_id_69d516_idx',
+        ),
+        migrations.AddIndex(
+            model_name='mfadevice',
+            index=models.Index(fields=['user', 'is_verified', 'is_primary'], name='authenticat_user_id_e0e609_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-08-31 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_user_users_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='password_changed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Mot de passe modifié le'),
+        ),
+    ]
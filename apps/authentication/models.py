@@ -17,11 +17,13 @@ Pour dire à Django d'utiliser notre User :
 
 import uuid
 from django.db import models
+from django.db.models import BooleanField, Case, F, Value, When
+from django.db.models.functions import Lower, Now
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 
 from core.models import BaseModel
-from core.constants import USER_ROLE_CHOICES, ROLE_VIEWER
+from core.constants import USER_ROLE_CHOICES, ROLE_ADMIN, ROLE_ENGINEER, ROLE_VIEWER
 
 
 # ============================================================
@@ -68,7 +70,7 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
         extra_fields.setdefault('is_active', True)
-        extra_fields.setdefault('role', 'admin')
+        extra_fields.setdefault('role', ROLE_ADMIN)
 
         if extra_fields.get('is_staff') is not True:
             raise ValueError("Le superutilisateur doit avoir is_staff=True.")
@@ -77,6 +79,22 @@ class UserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def with_lock_status(self):
+        """
+        Annote chaque ligne avec is_locked_db calculé côté SQL.
+
+        Évite d'appeler la @property is_locked (et donc timezone.now())
+        pour chaque utilisateur d'une liste : une seule évaluation
+        par requête, avec possibilité d'index sur locked_until.
+        """
+        return self.annotate(
+            is_locked_db=Case(
+                When(locked_until__gt=Now(), then=True),
+                default=False,
+                output_field=BooleanField(),
+            )
+        )
+
 
 # ============================================================
 # MODÈLE USER PERSONNALISÉ
@@ -102,10 +120,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     """
 
     # --- Identité ---
-    id = models.UUIDField(
-        primary_key=True,
+    # PK entière auto-incrémentée (BigAutoField via DEFAULT_AUTO_FIELD) :
+    # les UUID v4 aléatoires en PK fragmentent le B-tree à l'INSERT et
+    # doublent la taille de chaque index FK (16 octets vs 8).
+    # L'UUID reste l'identifiant exposé à l'extérieur (API, tokens JWT).
+    public_id = models.UUIDField(
         default=uuid.uuid4,
-        editable=False
+        unique=True,
+        editable=False,
+        verbose_name="Identifiant public"
     )
     email = models.EmailField(
         unique=True,
@@ -129,8 +152,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
 
     # --- Rôle et permissions ---
-    role = models.CharField(
-        max_length=20,
+    role = models.PositiveSmallIntegerField(
         choices=USER_ROLE_CHOICES,
         default=ROLE_VIEWER,
         verbose_name="Rôle"
@@ -164,6 +186,11 @@ class User(AbstractBaseUser, PermissionsMixin):
         blank=True,
         verbose_name="Compte bloqué jusqu'au"
     )
+    password_changed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Mot de passe modifié le"
+    )
 
     # --- Certification électrique (Assystem) ---
     electrical_certified = models.BooleanField(
@@ -198,6 +225,13 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name      = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
         ordering          = ['-date_joined']
+        indexes = [
+            # Filtres admin et vérification de blocage au login
+            models.Index(fields=['role']),
+            models.Index(fields=['locked_until']),
+            # Lookup insensible à la casse du SSO (email__iexact)
+            models.Index(Lower('email'), name='users_email_lower_idx'),
+        ]
 
     def __str__(self):
         return f"{self.full_name} <{self.email}>"
@@ -219,11 +253,12 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     @property
     def is_admin(self):
-        return self.role == 'admin'
+        return self.role == ROLE_ADMIN
 
     @property
     def is_engineer(self):
-        return self.role in ['engineer', 'admin']
+        # Les rôles sont ordonnés par privilège : une seule comparaison
+        return self.role >= ROLE_ENGINEER
 
     # --- Méthodes ---
 
@@ -237,14 +272,25 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         Incrémente le compteur d'échecs.
         Bloque le compte après max_attempts tentatives.
+
+        L'incrément et le blocage sont faits dans un seul UPDATE avec
+        F() : deux échecs simultanés ne peuvent plus se relire l'un
+        l'autre et passer sous le seuil de blocage (read-modify-write).
         """
         from datetime import timedelta
-        self.failed_login_attempts += 1
-
-        if self.failed_login_attempts >= max_attempts:
-            self.locked_until = timezone.now() + timedelta(minutes=lockout_minutes)
 
-        self.save(update_fields=['failed_login_attempts', 'locked_until'])
+        User.objects.filter(pk=self.pk).update(
+            failed_login_attempts=F('failed_login_attempts') + 1,
+            locked_until=Case(
+                # >= max - 1 car la valeur lue n'inclut pas encore l'incrément
+                When(
+                    failed_login_attempts__gte=max_attempts - 1,
+                    then=Value(timezone.now() + timedelta(minutes=lockout_minutes)),
+                ),
+                default=F('locked_until'),
+            ),
+        )
+        self.refresh_from_db(fields=['failed_login_attempts', 'locked_until'])
 
 
 # ============================================================
@@ -316,6 +362,11 @@ class MFADevice(BaseModel):
         verbose_name        = "Dispositif MFA"
         verbose_name_plural = "Dispositifs MFA"
         unique_together     = [('user', 'device_type', 'name')]
+        indexes = [
+            # Couvre le lookup de vérification MFA :
+            # get(user, is_verified=True, is_primary=True)
+            models.Index(fields=['user', 'is_verified', 'is_primary']),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.get_device_type_display()}"
@@ -372,12 +423,33 @@ class UserSession(BaseModel):
         verbose_name        = "Session utilisateur"
         verbose_name_plural = "Sessions utilisateurs"
         ordering            = ['-created_at']
+        indexes = [
+            # Fermeture des sessions actives au logout (WHERE user + is_active)
+            models.Index(fields=['user', 'is_active']),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.ip_address} - {self.created_at}"
 
     def logout(self):
-        """Marque la session comme terminée."""
-        self.is_active    = False
-        self.logged_out_at = timezone.now()
-        self.save(update_fields=['is_active', 'logged_out_at'])
\ No newline at end of file
+        """Marque la session comme terminée (un seul UPDATE, via close())."""
+        if type(self).close(self.pk):
+            self.is_active     = False
+            self.logged_out_at = timezone.now()
+
+    @classmethod
+    def close(cls, session_id):
+        """
+        Ferme une session par id sans charger la ligne.
+
+        Un seul UPDATE au lieu d'un SELECT + save(), avec l'horodatage
+        calculé côté base (Now()) — pas d'aller-retour d'horloge
+        Python → BDD.
+
+        Returns:
+            int : Nombre de lignes fermées (0 si déjà fermée/inconnue)
+        """
+        return cls.objects.filter(pk=session_id, is_active=True).update(
+            is_active=False,
+            logged_out_at=Now(),
+        )
\ No newline at end of file
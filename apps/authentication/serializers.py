@@ -14,18 +14,29 @@ Flux complet :
     → {"id": "...", "email": "...", "tokens": {...}}
 """
 
+import re
+
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError
 from rest_framework import serializers
 
+from core.mixins import CachedFieldsMixin
+from core.utils import normalize_email
+
 from .models import User, MFADevice
 
+# Compilé une seule fois à l'import (pas de re-parse du motif par requête).
+# [0-9] et non \d : \d matche tous les chiffres Unicode (Nd), que
+# compare_digest rejetterait plus loin avec un TypeError
+_MFA_CODE_RE = re.compile(r'[0-9]{6}')
+
 
 # ============================================================
 # SERIALIZER : AFFICHAGE UTILISATEUR
 # ============================================================
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Sérialise un utilisateur pour l'affichage dans l'API.
 
@@ -34,14 +45,18 @@ class UserSerializer(serializers.ModelSerializer):
     - Réponse après login réussi
     - Liste des utilisateurs (admin)
     """
-    full_name = serializers.CharField(read_only=True)
-    is_locked = serializers.BooleanField(read_only=True)
+    # L'API expose l'UUID public, jamais la PK interne auto-incrémentée
+    id         = serializers.UUIDField(source='public_id', read_only=True)
+    full_name  = serializers.CharField(read_only=True)
+    # role est un entier en base ; le libellé lisible l'accompagne
+    role_label = serializers.CharField(source='get_role_display', read_only=True)
+    is_locked  = serializers.SerializerMethodField()
 
     class Meta:
         model  = User
         fields = [
             'id', 'email', 'first_name', 'last_name', 'full_name',
-            'role', 'is_active', 'mfa_enabled', 'email_verified',
+            'role', 'role_label', 'is_active', 'mfa_enabled', 'email_verified',
             'electrical_certified', 'avatar', 'date_joined',
             'last_login', 'is_locked',
         ]
@@ -51,12 +66,23 @@ class UserSerializer(serializers.ModelSerializer):
             'mfa_enabled', 'email_verified', 'is_locked',
         ]
 
+    def get_is_locked(self, obj):
+        """
+        Préfère l'annotation SQL is_locked_db (User.objects.with_lock_status())
+        quand elle est présente ; sinon retombe sur la @property du modèle.
+        """
+        is_locked_db = getattr(obj, 'is_locked_db', None)
+        if is_locked_db is not None:
+            return is_locked_db
+        return obj.is_locked
+
 
-class UserPublicSerializer(serializers.ModelSerializer):
+class UserPublicSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Version publique du profil utilisateur (données minimales).
     Utilisé quand on affiche l'auteur d'un élément.
     """
+    id        = serializers.UUIDField(source='public_id', read_only=True)
     full_name = serializers.CharField(read_only=True)
 
     class Meta:
@@ -95,14 +121,14 @@ class RegisterSerializer(serializers.ModelSerializer):
             'email', 'password', 'password2',
             'first_name', 'last_name'
         ]
+        # Sans ceci, DRF attache un UniqueValidator au champ email
+        # (unique=True sur le modèle) qui refait le SELECT d'existence
+        # que create() cherche justement à éviter
+        extra_kwargs = {'email': {'validators': []}}
 
     def validate_email(self, value):
-        """Vérifie que l'email n'est pas déjà utilisé."""
-        if User.objects.filter(email=value.lower()).exists():
-            raise serializers.ValidationError(
-                "Un compte avec cet email existe déjà."
-            )
-        return value.lower()
+        """Normalise l'email (l'unicité est garantie par la contrainte DB)."""
+        return normalize_email(value)
 
     def validate(self, attrs):
         """Vérifie que les deux mots de passe correspondent."""
@@ -113,9 +139,21 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        """Crée l'utilisateur (sans le champ password2)."""
+        """
+        Crée l'utilisateur (sans le champ password2).
+
+        Pas de SELECT préalable pour tester l'existence de l'email :
+        on laisse la contrainte unique=True trancher, ce qui évite une
+        requête sur le chemin chaud et supprime la course entre deux
+        inscriptions simultanées.
+        """
         validated_data.pop('password2')
-        return User.objects.create_user(**validated_data)
+        try:
+            return User.objects.create_user(**validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'email': "Un compte avec cet email existe déjà."
+            })
 
 
 # ============================================================
@@ -140,13 +178,26 @@ class LoginSerializer(serializers.Serializer):
         Vérifie que l'email + mot de passe sont corrects.
         Retourne l'utilisateur si valide.
         """
-        email    = attrs.get('email', '').lower()
+        email    = normalize_email(attrs.get('email', ''))
         password = attrs.get('password')
 
-        # Chercher l'utilisateur
+        # Chercher l'utilisateur — on ne charge que les colonnes utiles à
+        # la validation et à la réponse de login (UserSerializer), pas
+        # l'avatar ni les champs de certification : moins d'octets lus
+        # et matérialisés par tentative de connexion
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.only(
+                'id', 'public_id', 'email', 'password', 'first_name',
+                'last_name', 'role', 'is_active', 'mfa_enabled',
+                'email_verified', 'electrical_certified', 'avatar',
+                'failed_login_attempts', 'locked_until',
+                'date_joined', 'last_login',
+            ).get(email=email)
         except User.DoesNotExist:
+            # Brûler le même temps de hachage que pour un email connu :
+            # sans cela, la réponse rapide sur email inconnu permet
+            # d'énumérer les comptes en mesurant la latence.
+            User().set_password(password)
             raise serializers.ValidationError(
                 "Email ou mot de passe incorrect."
             )
@@ -223,7 +274,7 @@ class PasswordChangeSerializer(serializers.Serializer):
 # SERIALIZERS : MFA
 # ============================================================
 
-class MFADeviceSerializer(serializers.ModelSerializer):
+class MFADeviceSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """Affiche un dispositif MFA (sans la clé secrète !)."""
     device_type_label = serializers.CharField(
         source='get_device_type_display',
@@ -239,7 +290,7 @@ class MFADeviceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'is_verified', 'last_used']
 
 
-class MFAEnableSerializer(serializers.Serializer):
+class MFAEnableSerializer(CachedFieldsMixin, serializers.Serializer):
     """
     Initie l'activation du MFA.
     Retourne le QR Code à scanner avec Google Authenticator.
@@ -254,7 +305,7 @@ class MFAEnableSerializer(serializers.Serializer):
     )
 
 
-class MFAVerifySerializer(serializers.Serializer):
+class MFAVerifySerializer(CachedFieldsMixin, serializers.Serializer):
     """
     Vérifie un code MFA (6 chiffres).
     Utilisé lors de la connexion ou de l'activation du MFA.
@@ -266,19 +317,35 @@ class MFAVerifySerializer(serializers.Serializer):
     )
 
     def validate_code(self, value):
-        """Vérifie que le code ne contient que des chiffres."""
-        if not value.isdigit():
+        """Vérifie que le code est exactement 6 chiffres ASCII."""
+        if not _MFA_CODE_RE.fullmatch(value):
             raise serializers.ValidationError(
                 "Le code doit contenir uniquement des chiffres."
             )
         return value
 
 
+class MFAConfirmSerializer(MFAVerifySerializer):
+    """
+    Confirme l'activation du MFA (premier code après scan du QR).
+    Hérite la validation du code de MFAVerifySerializer.
+    """
+    device_id = serializers.UUIDField()
+
+
+class MFALoginVerifySerializer(MFAVerifySerializer):
+    """
+    Vérifie le code MFA lors de la connexion (étape 2 du login).
+    user_id est l'UUID public retourné par la réponse mfa_required.
+    """
+    user_id = serializers.UUIDField()
+
+
 # ============================================================
 # SERIALIZER : MISE À JOUR PROFIL
 # ============================================================
 
-class UpdateProfileSerializer(serializers.ModelSerializer):
+class UpdateProfileSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Mise à jour du profil utilisateur.
     Seuls certains champs sont modifiables par l'utilisateur.
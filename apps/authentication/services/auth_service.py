@@ -9,6 +9,7 @@ Principe de séparation des responsabilités :
 Avantage : Le service est testable sans serveur HTTP.
 """
 
+from django.db import transaction
 from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -66,7 +67,7 @@ class AuthService:
         if user.mfa_enabled:
             return {
                 'mfa_required': True,
-                'user_id': str(user.id),
+                'user_id': str(user.public_id),
                 'message': "Veuillez saisir votre code MFA."
             }
 
@@ -96,20 +97,24 @@ class AuthService:
             user          : Utilisateur à déconnecter
             refresh_token : Token à blacklister
         """
-        try:
-            token = RefreshToken(refresh_token)
-            token.blacklist()  # Rend le token invalide
-        except Exception:
-            pass  # Token déjà invalide, pas grave
-
-        # Fermer la session active en base
-        UserSession.objects.filter(
-            user=user,
-            is_active=True
-        ).update(
-            is_active=False,
-            logged_out_at=timezone.now()
-        )
+        # Une seule transaction pour le blacklist (get_or_create + create
+        # côté simplejwt) et la fermeture des sessions : un seul COMMIT
+        # au lieu d'un par requête
+        with transaction.atomic():
+            try:
+                token = RefreshToken(refresh_token)
+                token.blacklist()  # Rend le token invalide
+            except Exception:
+                pass  # Token déjà invalide, pas grave
+
+            # Fermer la session active en base (un seul UPDATE)
+            UserSession.objects.filter(
+                user=user,
+                is_active=True
+            ).update(
+                is_active=False,
+                logged_out_at=timezone.now()
+            )
 
     # --------------------------------------------------------
     # MÉTHODES PRIVÉES (helpers internes)
@@ -140,21 +145,36 @@ class AuthService:
     @staticmethod
     def _record_session(user: User, request) -> None:
         """
-        Enregistre une nouvelle session en base de données.
-        Utilisé pour l'audit de sécurité.
+        Enregistre une nouvelle session (audit de sécurité).
+
+        L'extraction IP/user-agent (bon marché) se fait ici ; l'INSERT
+        et la mise à jour de last_login partent en tâche Celery pour
+        sortir l'écriture de la latence de réponse du login. Si le
+        broker est indisponible (dev sans Redis), on retombe sur
+        l'écriture synchrone.
         """
+        from ..tasks import record_session_task
+
         ip_address = AuthService._get_client_ip(request)
         user_agent = request.META.get('HTTP_USER_AGENT', '')
+        if len(user_agent) > 500:
+            user_agent = user_agent[:500]  # Limiter la taille (copie évitée sinon)
 
-        UserSession.objects.create(
-            user       = user,
-            ip_address = ip_address,
-            user_agent = user_agent[:500],  # Limiter la taille
-        )
-
-        # Mettre à jour last_login
         user.last_login = timezone.now()
-        user.save(update_fields=['last_login'])
+
+        try:
+            record_session_task.delay(
+                user.pk, ip_address, user_agent, user.last_login.isoformat()
+            )
+        except Exception:
+            # Broker absent : une seule transaction, un seul COMMIT
+            with transaction.atomic():
+                UserSession.objects.create(
+                    user       = user,
+                    ip_address = ip_address,
+                    user_agent = user_agent,
+                )
+                User.objects.filter(pk=user.pk).update(last_login=user.last_login)
 
     @staticmethod
     def _get_client_ip(request) -> str:
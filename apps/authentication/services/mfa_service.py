@@ -13,15 +13,54 @@ Bibliothèque utilisée : pyotp (Python One-Time Password)
 Installation : pip install pyotp qrcode
 """
 
+import hmac
+import time
 import pyotp
 import qrcode
 import base64
+import threading
+from qrcode.image.svg import SvgPathImage
+from functools import lru_cache
 from io import BytesIO
+from django.core.cache import cache
 from django.utils import timezone
 
 from ..models import User, MFADevice
 
 
+@lru_cache(maxsize=1024)
+def _get_totp(secret_key: str) -> pyotp.TOTP:
+    """
+    Retourne une instance TOTP réutilisable pour une clé secrète.
+
+    Construire un pyotp.TOTP re-décode le secret base32 à chaque appel ;
+    les instances sont sans état vis-à-vis de verify(), on peut donc les
+    partager entre connexions du même utilisateur (cache processus).
+    Sert encore pour provisioning_uri() ; la vérification elle-même
+    passe par _hotp_code ci-dessous.
+    """
+    return pyotp.TOTP(secret_key)
+
+
+@lru_cache(maxsize=1024)
+def _b32_key(secret_key: str) -> bytes:
+    """Décode le secret base32 une seule fois par clé (cache processus)."""
+    return base64.b32decode(secret_key, casefold=True)
+
+
+def _hotp_code(key: bytes, counter: int) -> str:
+    """
+    Calcule un code HOTP (RFC 4226) : HMAC-SHA1 + troncature dynamique.
+
+    hmac/hashlib délèguent le SHA1 à OpenSSL : tout le coût Python de
+    pyotp (construction d'objet, formatage) disparaît du chemin chaud.
+    """
+    mac    = hmac.new(key, counter.to_bytes(8, 'big'), 'sha1').digest()
+    offset = mac[19] & 0x0F
+    binary = int.from_bytes(mac[offset:offset + 4], 'big') & 0x7FFFFFFF
+    return f'{binary % 1_000_000:06d}'
+
+
 class MFAService:
 
     APP_NAME = "ElectroSecure Platform"
@@ -46,12 +85,15 @@ class MFAService:
                 'device_id': '<uuid>'           → ID du dispositif créé
             }
         """
-        # Supprimer tout dispositif TOTP non vérifié existant
-        MFADevice.objects.filter(
+        # Supprimer tout dispositif TOTP non vérifié existant.
+        # _raw_delete : DELETE direct — rien ne référence MFADevice,
+        # inutile de payer le SELECT du collector de delete()
+        stale = MFADevice.objects.filter(
             user=user,
             device_type=MFADevice.DEVICE_TYPE_TOTP,
             is_verified=False
-        ).delete()
+        )
+        stale._raw_delete(stale.db)
 
         # Générer une nouvelle clé secrète base32
         secret_key = pyotp.random_base32()
@@ -66,7 +108,7 @@ class MFAService:
         )
 
         # Générer l'URL pour Google Authenticator
-        totp_uri = pyotp.totp.TOTP(secret_key).provisioning_uri(
+        totp_uri = _get_totp(secret_key).provisioning_uri(
             name=user.email,
             issuer_name=MFAService.APP_NAME
         )
@@ -105,15 +147,20 @@ class MFAService:
         if not MFAService._verify_totp(device.secret_key, code):
             return False
 
-        # Marquer le dispositif comme vérifié
-        device.is_verified = True
-        device.is_primary  = True
-        device.last_used   = timezone.now()
-        device.save()
+        # Marquer le dispositif comme vérifié — un seul UPDATE ciblé,
+        # pas de save() complet ni de signaux inutiles
+        MFADevice.objects.filter(pk=device.pk).update(
+            is_verified=True,
+            is_primary=True,
+            last_used=timezone.now(),
+        )
 
-        # Activer le MFA sur le compte
+        # Activer le MFA sur le compte (idem : UPDATE direct)
         user.mfa_enabled = True
-        user.save(update_fields=['mfa_enabled'])
+        User.objects.filter(pk=user.pk).update(mfa_enabled=True)
+
+        # Un éventuel couple (secret, id) périmé ne doit pas survivre
+        cache.delete(f'mfa:secret:{user.pk}')
 
         return True
 
@@ -132,20 +179,30 @@ class MFAService:
         Returns:
             bool : True si le code est valide
         """
-        try:
-            device = MFADevice.objects.get(
+        # values_list : seuls la clé et l'id sont lus, sans matérialiser
+        # d'instance MFADevice (ni descripteurs de champs, ni signaux).
+        # Le couple est gardé 5 min en cache : une seule requête BDD
+        # pour les vérifications rapprochées du même utilisateur.
+        # (get_or_set ne met pas None en cache : l'absence de dispositif
+        # est re-vérifiée à chaque appel.)
+        row = cache.get_or_set(
+            f'mfa:secret:{user.pk}',
+            lambda: MFADevice.objects.filter(
                 user=user,
                 is_verified=True,
-                is_primary=True
-            )
-        except MFADevice.DoesNotExist:
+                is_primary=True,
+            ).values_list('secret_key', 'id').first(),
+            timeout=300,
+        )
+
+        if row is None:
             return False
 
-        is_valid = MFAService._verify_totp(device.secret_key, code)
+        secret_key, device_id = row
+        is_valid = MFAService._verify_totp(secret_key, code)
 
         if is_valid:
-            device.last_used = timezone.now()
-            device.save(update_fields=['last_used'])
+            MFADevice.objects.filter(pk=device_id).update(last_used=timezone.now())
 
         return is_valid
 
@@ -168,8 +225,15 @@ class MFAService:
         if not MFAService.verify_mfa_code(user, code):
             return False
 
-        # Supprimer tous les dispositifs
-        MFADevice.objects.filter(user=user).delete()
+        # Supprimer tous les dispositifs (DELETE direct, cf. initiate)
+        devices = MFADevice.objects.filter(user=user)
+        devices._raw_delete(devices.db)
+
+        # Purger les caches : les secrets supprimés ne doivent
+        # pas rester en mémoire
+        cache.delete(f'mfa:secret:{user.pk}')
+        _get_totp.cache_clear()
+        _b32_key.cache_clear()
 
         # Désactiver le MFA sur le compte
         user.mfa_enabled = False
@@ -184,13 +248,47 @@ class MFAService:
     @staticmethod
     def _verify_totp(secret_key: str, code: str) -> bool:
         """
-        Vérifie un code TOTP.
+        Vérifie un code TOTP (RFC 6238, pas de 30 s).
 
-        valid_window=1 : Accepte le code de la période précédente
+        Fenêtre de ±1 période : accepte le code de la période précédente
         et suivante (tolérance horloge de ±30 secondes).
+
+        Les candidats sont essayés dans l'ordre de probabilité — T
+        d'abord (horloge juste, cas ultra-majoritaire), puis T-1, T+1 —
+        avec sortie anticipée au premier match. Chaque comparaison reste
+        en temps constant (compare_digest) ; seul le nombre de candidats
+        évalués varie, et savoir quel compteur a matché n'apprend rien
+        d'exploitable à un attaquant (le code soumis était valide).
         """
-        totp = pyotp.TOTP(secret_key)
-        return totp.verify(code, valid_window=1)
+        # Comparaison sur octets : compare_digest lève un TypeError sur
+        # des str non-ASCII (chiffres Unicode), que le serializer rejette
+        # mais qu'un appel direct au service pourrait laisser passer
+        submitted = code.encode('utf-8', errors='replace')
+
+        # Longueur inattendue (le serializer garantit 6 chiffres, mais le
+        # service peut être appelé directement) : brûler quand même une
+        # comparaison avant de refuser, pour ne pas répondre plus vite
+        if len(submitted) != 6:
+            hmac.compare_digest(b'000000', submitted)
+            return False
+
+        key = _b32_key(secret_key)
+        t   = int(time.time() // 30)
+        for c in (t, t - 1, t + 1):
+            if hmac.compare_digest(_hotp_code(key, c).encode(), submitted):
+                return True
+        return False
+
+    # Instance QRCode réutilisée entre les setups MFA : la configuration
+    # (ECC, tailles) n'est construite qu'une fois, clear() ne remet à zéro
+    # que les données. Mutable et partagée → accès sous verrou.
+    _QR = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    _QR_LOCK = threading.Lock()
 
     @staticmethod
     def _generate_qr_code(uri: str) -> str:
@@ -198,23 +296,24 @@ class MFAService:
         Génère un QR Code à partir de l'URI TOTP.
         Retourne l'image en base64 pour l'affichage web.
 
+        SVG plutôt que PNG : le vectoriel ne parcourt que les modules du
+        code (pas les pixels) et évite l'encodage zlib de PIL — tout en
+        restant net à n'importe quelle taille d'affichage.
+
         Returns:
-            str : 'data:image/png;base64,<données>'
+            str : 'data:image/svg+xml;base64,<données>'
         """
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(uri)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
+        with MFAService._QR_LOCK:
+            qr = MFAService._QR
+            qr.clear()
+            qr.version = 1  # make(fit=True) a pu l'augmenter au tour précédent
+            qr.add_data(uri)
+            qr.make(fit=True)
+            img = qr.make_image(image_factory=SvgPathImage)
 
         buffer = BytesIO()
-        img.save(buffer, format='PNG')
+        img.save(buffer)
         buffer.seek(0)
 
         img_b64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        return f"data:image/png;base64,{img_b64}"
\ No newline at end of file
+        return f"data:image/svg+xml;base64,{img_b64}"
\ No newline at end of file
@@ -23,12 +23,28 @@ Note : Pour une vraie implémentation, utiliser
 'social-auth-app-django' ou 'django-allauth'.
 """
 
+import jwt
 import requests
+from urllib.parse import urlencode
+from django.db import IntegrityError
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 
+from core.utils import normalize_email
+
 from ..models import User
 from .auth_service import AuthService
 
+# Session partagée avec pool de connexions : keep-alive + reprise de
+# session TLS entre les callbacks SSO, au lieu d'un handshake complet
+# (DNS + TCP + TLS) pour chacun des deux appels sortants par connexion
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+# (connexion, lecture) — ne jamais bloquer un worker indéfiniment sur
+# un provider qui ne répond pas
+_TIMEOUT = (3, 10)
+
 
 class SSOService:
 
@@ -60,8 +76,9 @@ class SSOService:
         tenant = settings.MICROSOFT_TENANT_ID
         base_url = f"https://login.microsoftonline.com/{tenant}/oauth2/v2.0/authorize"
 
-        param_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-        return f"{base_url}?{param_string}"
+        # urlencode (implémentation C) échappe aussi state/redirect_uri,
+        # que la concaténation manuelle laissait passer tels quels
+        return f"{base_url}?{urlencode(params)}"
 
     @staticmethod
     def handle_microsoft_callback(code: str, request) -> dict:
@@ -87,8 +104,11 @@ class SSOService:
         if not access_token:
             raise ValueError("Impossible d'obtenir le token Microsoft.")
 
-        # 2. Récupérer les infos de l'utilisateur
-        user_info = SSOService._get_microsoft_user_info(access_token)
+        # 2. Récupérer les infos de l'utilisateur — d'abord depuis
+        # l'id_token déjà reçu (zéro appel réseau), sinon via Graph
+        user_info = SSOService._claims_from_id_token(token_data, provider='microsoft')
+        if user_info is None:
+            user_info = SSOService._get_microsoft_user_info(access_token)
 
         # 3. Créer ou retrouver l'utilisateur
         user, created = SSOService._get_or_create_user(user_info, provider='microsoft')
@@ -97,10 +117,15 @@ class SSOService:
         tokens = AuthService._generate_tokens(user)
         AuthService._record_session(user, request)
 
+        # user_data sérialisé ici, une seule fois : la vue renvoie le
+        # dict tel quel au lieu de repasser par UserSerializer
+        from ..serializers import UserSerializer
+
         return {
-            'user':    user,
-            'tokens':  tokens,
-            'created': created,  # True si nouveau compte créé
+            'user':      user,
+            'user_data': UserSerializer(user).data,
+            'tokens':    tokens,
+            'created':   created,  # True si nouveau compte créé
         }
 
     # --------------------------------------------------------
@@ -121,8 +146,7 @@ class SSOService:
             'access_type':   'offline',
         }
         base_url = "https://accounts.google.com/o/oauth2/v2/auth"
-        param_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-        return f"{base_url}?{param_string}"
+        return f"{base_url}?{urlencode(params)}"
 
     @staticmethod
     def handle_google_callback(code: str, request) -> dict:
@@ -135,13 +159,23 @@ class SSOService:
         if not access_token:
             raise ValueError("Impossible d'obtenir le token Google.")
 
-        user_info = SSOService._get_google_user_info(access_token)
+        user_info = SSOService._claims_from_id_token(token_data, provider='google')
+        if user_info is None:
+            user_info = SSOService._get_google_user_info(access_token)
+
         user, created = SSOService._get_or_create_user(user_info, provider='google')
 
         tokens = AuthService._generate_tokens(user)
         AuthService._record_session(user, request)
 
-        return {'user': user, 'tokens': tokens, 'created': created}
+        from ..serializers import UserSerializer
+
+        return {
+            'user':      user,
+            'user_data': UserSerializer(user).data,
+            'tokens':    tokens,
+            'created':   created,
+        }
 
     # --------------------------------------------------------
     # MÉTHODES PRIVÉES
@@ -153,7 +187,7 @@ class SSOService:
         tenant = settings.MICROSOFT_TENANT_ID
         url = f"https://login.microsoftonline.com/{tenant}/oauth2/v2.0/token"
 
-        response = requests.post(url, data={
+        response = _SESSION.post(url, timeout=_TIMEOUT, data={
             'client_id':     settings.MICROSOFT_CLIENT_ID,
             'client_secret': settings.MICROSOFT_CLIENT_SECRET,
             'code':          code,
@@ -162,12 +196,58 @@ class SSOService:
         })
         return response.json()
 
+    @staticmethod
+    def _claims_from_id_token(token_data: dict, provider: str) -> dict | None:
+        """
+        Extrait les infos utilisateur de l'id_token OpenID Connect.
+
+        Les deux providers renvoient un id_token avec email/prénom/nom
+        dès l'échange du code : le lire évite le second appel HTTP
+        (Graph ou userinfo), qui domine la latence du callback.
+
+        La signature n'est pas revérifiée : le token arrive directement
+        du endpoint /token du provider via notre canal TLS
+        serveur-à-serveur (il ne transite jamais par le navigateur) ;
+        l'audience est tout de même contrôlée.
+
+        Returns:
+            dict | None : user_info, ou None si id_token absent/illisible
+                          (on retombe alors sur l'appel userinfo)
+        """
+        id_token = token_data.get('id_token')
+        if not id_token:
+            return None
+
+        try:
+            claims = jwt.decode(id_token, options={'verify_signature': False})
+        except jwt.PyJWTError:
+            return None
+
+        expected_aud = (
+            settings.MICROSOFT_CLIENT_ID if provider == 'microsoft'
+            else settings.GOOGLE_CLIENT_ID
+        )
+        if claims.get('aud') != expected_aud:
+            return None
+
+        email = claims.get('email') or claims.get('preferred_username')
+        if not email:
+            return None
+
+        return {
+            'email':       email,
+            'first_name':  claims.get('given_name', ''),
+            'last_name':   claims.get('family_name', ''),
+            'provider_id': claims.get('oid') or claims.get('sub'),
+        }
+
     @staticmethod
     def _get_microsoft_user_info(access_token: str) -> dict:
         """Récupère les infos utilisateur depuis l'API Microsoft Graph."""
-        response = requests.get(
+        response = _SESSION.get(
             'https://graph.microsoft.com/v1.0/me',
-            headers={'Authorization': f'Bearer {access_token}'}
+            headers={'Authorization': f'Bearer {access_token}'},
+            timeout=_TIMEOUT,
         )
         data = response.json()
         return {
@@ -180,7 +260,7 @@ class SSOService:
     @staticmethod
     def _exchange_google_code(code: str) -> dict:
         """Échange le code d'autorisation contre un token Google."""
-        response = requests.post('https://oauth2.googleapis.com/token', data={
+        response = _SESSION.post('https://oauth2.googleapis.com/token', timeout=_TIMEOUT, data={
             'client_id':     settings.GOOGLE_CLIENT_ID,
             'client_secret': settings.GOOGLE_CLIENT_SECRET,
             'code':          code,
@@ -192,9 +272,10 @@ class SSOService:
     @staticmethod
     def _get_google_user_info(access_token: str) -> dict:
         """Récupère les infos utilisateur depuis l'API Google."""
-        response = requests.get(
+        response = _SESSION.get(
             'https://www.googleapis.com/oauth2/v2/userinfo',
-            headers={'Authorization': f'Bearer {access_token}'}
+            headers={'Authorization': f'Bearer {access_token}'},
+            timeout=_TIMEOUT,
         )
         data = response.json()
         return {
@@ -212,24 +293,41 @@ class SSOService:
         Returns:
             tuple : (User, created: bool)
         """
-        email = user_info.get('email', '').lower()
+        email = normalize_email(user_info.get('email', ''))
 
         if not email:
             raise ValueError("Impossible de récupérer l'email depuis le provider SSO.")
 
-        user, created = User.objects.get_or_create(
-            email=email,
-            defaults={
-                'first_name':    user_info.get('first_name', ''),
-                'last_name':     user_info.get('last_name', ''),
-                'email_verified': True,  # Email vérifié par le provider
-                'is_active':     True,
-            }
-        )
-
-        # Mettre à jour last_login
+        # Lookup insensible à la casse (couvert par users_email_lower_idx) :
+        # les comptes créés avant la normalisation systématique restent
+        # retrouvables même si le provider change la casse de l'email
+        user    = User.objects.filter(email__iexact=email).first()
+        created = False
+
+        if user is None:
+            try:
+                user = User.objects.create(
+                    email          = email,
+                    first_name     = user_info.get('first_name', ''),
+                    last_name      = user_info.get('last_name', ''),
+                    email_verified = True,  # Email vérifié par le provider
+                    is_active      = True,
+                )
+                created = True
+            except IntegrityError:
+                # Deux callbacks simultanés pour un nouveau compte :
+                # l'autre a gagné la course, on le récupère
+                user = User.objects.filter(email__iexact=email).first()
+
+        # Mettre à jour last_login — UPDATE direct, et au plus une fois
+        # par minute : cache.add est atomique, les callbacks SSO répétés
+        # (refresh de token mal câblé côté client) ne réécrivent pas la
+        # même valeur à quelques secondes près
+        from django.core.cache import cache
         from django.utils import timezone
+
         user.last_login = timezone.now()
-        user.save(update_fields=['last_login'])
+        if cache.add(f'sso:last_login:{user.pk}', 1, timeout=60):
+            User.objects.filter(pk=user.pk).update(last_login=user.last_login)
 
         return user, created
\ No newline at end of file
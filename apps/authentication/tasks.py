@@ -1,6 +1,7 @@
 """
-Tâches Celery périodiques pour l'app authentication.
+Tâches Celery pour l'app authentication.
 
+- send_welcome_email_task     → à l'inscription (on_commit de la vue)
 - cleanup_expired_tokens_task → toutes les heures
 """
 
@@ -10,6 +11,73 @@ from celery import shared_task
 logger = logging.getLogger('electrosecure')
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=30, acks_late=True)
+def record_session_task(self, user_id, ip_address, user_agent, login_at):
+    """
+    Enregistre la session d'audit hors du chemin de réponse.
+
+    L'INSERT de session et l'UPDATE de last_login sortent de la latence
+    perçue du login ; acks_late garantit qu'un crash du worker ne perd
+    pas la ligne d'audit (le message est re-délivré).
+    """
+    from django.db import transaction
+    from django.utils.dateparse import parse_datetime
+
+    from .models import User, UserSession
+
+    with transaction.atomic():
+        UserSession.objects.create(
+            user_id    = user_id,
+            ip_address = ip_address,
+            user_agent = user_agent,
+        )
+        User.objects.filter(pk=user_id).update(last_login=parse_datetime(login_at))
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_welcome_email_task(self, user_id):
+    """
+    Envoie l'email de bienvenue hors du cycle requête/réponse.
+
+    L'envoi SMTP synchrone bloquait l'inscription le temps du
+    handshake ; en tâche Celery, l'échec est réessayé (3 fois, 60 s)
+    sans impacter l'utilisateur.
+    """
+    from django.conf import settings
+    from django.core.mail import send_mail
+
+    from .models import User
+
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return  # Compte supprimé entre-temps, rien à envoyer
+
+    try:
+        send_mail(
+            subject='Bienvenue sur ElectroSecure Platform',
+            message=f"""
+Bonjour {user.full_name},
+
+Votre compte ElectroSecure Platform a été créé avec succès.
+
+Email : {user.email}
+Rôle  : {user.get_role_display()}
+
+Connectez-vous sur : http://localhost:8000/api/docs/
+
+Cordialement,
+L'équipe ElectroSecure
+            """,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[user.email],
+            fail_silently=False,
+        )
+    except Exception as exc:
+        logger.warning("[TASK] send_welcome_email retry : %s", exc)
+        raise self.retry(exc=exc)
+
+
 @shared_task(bind=True)
 def cleanup_expired_tokens_task(self):
     """
@@ -24,19 +92,32 @@ def cleanup_expired_tokens_task(self):
         from rest_framework_simplejwt.token_blacklist.models import (
             OutstandingToken, BlacklistedToken
         )
+        from django.db import connection, transaction
         from django.utils import timezone
 
-        # Supprimer les tokens expirés de la blacklist
-        deleted_bl, _ = BlacklistedToken.objects.filter(
-            token__expires_at__lt=timezone.now()
-        ).delete()
-
-        # Supprimer les tokens expirés non blacklistés
-        deleted_ot, _ = OutstandingToken.objects.filter(
-            expires_at__lt=timezone.now()
-        ).exclude(
-            blacklistedtoken__isnull=False
-        ).delete()
+        bl_table = BlacklistedToken._meta.db_table
+        ot_table = OutstandingToken._meta.db_table
+        now      = timezone.now()
+
+        # DELETE directs : le collector de QuerySet.delete() matérialise
+        # chaque ligne en Python avant de supprimer ; ici tout reste
+        # dans le moteur SQL, en une transaction
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Les entrées de blacklist dont le token est expiré
+            cursor.execute(
+                f'DELETE FROM {bl_table} WHERE token_id IN '
+                f'(SELECT id FROM {ot_table} WHERE expires_at < %s)',
+                [now],
+            )
+            deleted_bl = cursor.rowcount
+
+            # Les tokens expirés non (plus) blacklistés
+            cursor.execute(
+                f'DELETE FROM {ot_table} WHERE expires_at < %s '
+                f'AND id NOT IN (SELECT token_id FROM {bl_table})',
+                [now],
+            )
+            deleted_ot = cursor.rowcount
 
         logger.info(
             "[TASK] cleanup_expired_tokens : %d blacklisted + %d outstanding supprimés",
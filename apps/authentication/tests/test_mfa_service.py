@@ -0,0 +1,115 @@
+"""
+Tests du service MFA — Vérification TOTP maison (RFC 4226 / RFC 6238).
+
+La vérification n'emprunte plus pyotp sur le chemin chaud : ces tests
+garantissent que _hotp_code reste conforme aux vecteurs officiels et
+identique à pyotp, et que _verify_totp conserve la fenêtre ±1 période
+et le rejet en temps constant des codes mal formés.
+"""
+
+import base64
+import time
+
+import pyotp
+from django.test import SimpleTestCase
+from unittest.mock import patch
+
+from apps.authentication.services import mfa_service
+from apps.authentication.services.mfa_service import (
+    MFAService, _b32_key, _hotp_code,
+)
+
+# Secret de test : base32 de 'supersecret12345'
+_SECRET = base64.b32encode(b'supersecret12345').decode()
+
+
+class HotpCodeTest(SimpleTestCase):
+    """Conformité RFC 4226 et parité avec pyotp."""
+
+    # Vecteurs officiels de l'annexe D de la RFC 4226
+    # (clé ASCII '12345678901234567890')
+    RFC_KEY     = b'12345678901234567890'
+    RFC_VECTORS = [
+        (0, '755224'), (1, '287082'), (2, '359152'),
+        (3, '969429'), (4, '338314'), (5, '254676'),
+        (6, '287922'), (7, '162583'), (8, '399871'),
+        (9, '520489'),
+    ]
+
+    def test_rfc4226_test_vectors(self):
+        """Les 10 vecteurs de la RFC 4226 sont reproduits à l'identique."""
+        for counter, expected in self.RFC_VECTORS:
+            self.assertEqual(_hotp_code(self.RFC_KEY, counter), expected)
+
+    def test_parity_with_pyotp(self):
+        """Même code que pyotp pour plusieurs clés et compteurs."""
+        totp = pyotp.TOTP(_SECRET)
+        key  = _b32_key(_SECRET)
+        for counter in (0, 1, 57000000, 2**31):
+            self.assertEqual(
+                _hotp_code(key, counter),
+                totp.at(counter * 30),
+            )
+
+    def test_code_is_zero_padded(self):
+        """Le code fait toujours 6 caractères, zéros de tête compris."""
+        for counter in range(200):
+            self.assertEqual(len(_hotp_code(self.RFC_KEY, counter)), 6)
+
+    def test_b32_key_accepts_lowercase(self):
+        """Le décodage base32 tolère les secrets en minuscules."""
+        self.assertEqual(_b32_key(_SECRET.lower()), _b32_key(_SECRET))
+
+
+class VerifyTotpTest(SimpleTestCase):
+    """Fenêtre de tolérance et rejet des codes mal formés."""
+
+    # Instant fixe, multiple de 30 : T = _NOW // 30
+    _NOW = 1_700_000_010.0
+
+    def _code_at(self, period_offset):
+        key = _b32_key(_SECRET)
+        return _hotp_code(key, int(self._NOW // 30) + period_offset)
+
+    def _verify(self, code):
+        with patch.object(mfa_service.time, 'time', return_value=self._NOW):
+            return MFAService._verify_totp(_SECRET, code)
+
+    def test_accepts_current_period(self):
+        self.assertTrue(self._verify(self._code_at(0)))
+
+    def test_accepts_previous_period(self):
+        """Tolérance horloge : le code de T-1 reste accepté."""
+        self.assertTrue(self._verify(self._code_at(-1)))
+
+    def test_accepts_next_period(self):
+        """Tolérance horloge : le code de T+1 reste accepté."""
+        self.assertTrue(self._verify(self._code_at(+1)))
+
+    def test_rejects_outside_window(self):
+        """Au-delà de ±1 période, le code est refusé."""
+        self.assertFalse(self._verify(self._code_at(-2)))
+        self.assertFalse(self._verify(self._code_at(+2)))
+
+    def test_rejects_wrong_code(self):
+        wrong = '000000' if self._code_at(0) != '000000' else '111111'
+        self.assertFalse(self._verify(wrong))
+
+    def test_rejects_short_code(self):
+        self.assertFalse(self._verify('123'))
+
+    def test_rejects_empty_code(self):
+        self.assertFalse(self._verify(''))
+
+    def test_rejects_unicode_digits_without_crash(self):
+        """
+        Chiffres Unicode (Nd) : refusés sans TypeError — compare_digest
+        ne supporte pas les str non-ASCII, la comparaison passe par des
+        octets.
+        """
+        self.assertFalse(self._verify('٠١٢٣٤٥'))
+
+    def test_real_clock_roundtrip(self):
+        """Sans mock : le code de l'instant courant est accepté."""
+        code = _hotp_code(_b32_key(_SECRET), int(time.time() // 30))
+        self.assertTrue(MFAService._verify_totp(_SECRET, code))
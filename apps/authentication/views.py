@@ -10,7 +10,20 @@ Chaque vue :
 Les vues restent LÉGÈRES — toute la logique est dans les services.
 """
 
+import hashlib
+import hmac
+import json
+import secrets
+
+from django.conf import settings as django_settings
+from django.core.signing import BadSignature, TimestampSigner
+from django.db import transaction
+from django.http import HttpResponseNotModified
+from django.utils import timezone
 from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import (
+    OutstandingToken, BlacklistedToken,
+)
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -20,10 +33,12 @@ from .models import User, MFADevice, UserSession
 from .serializers import (
     UserSerializer, RegisterSerializer, LoginSerializer,
     PasswordChangeSerializer, MFAEnableSerializer,
-    MFAVerifySerializer, UpdateProfileSerializer,
+    MFAVerifySerializer, MFAConfirmSerializer,
+    MFALoginVerifySerializer, UpdateProfileSerializer,
     MFADeviceSerializer,
 )
 from .services.auth_service import AuthService
+from .tasks import send_welcome_email_task
 from .services.mfa_service import MFAService
 from .services.sso_service import SSOService
 from core.exceptions import ValidationError, NotFoundError
@@ -67,6 +82,14 @@ class RegisterView(APIView):
         user   = serializer.save()
         result = AuthService.register(user)
 
+        # Email de bienvenue hors requête, après COMMIT. Appel explicite
+        # ici plutôt que signal post_save : seul l'inscription envoie
+        # cet email, les autres save() de User n'ont rien à dispatcher.
+        user_id = user.pk
+        transaction.on_commit(
+            lambda: send_welcome_email_task.delay(user_id)
+        )
+
         return Response({
             'user':   UserSerializer(result['user']).data,
             'tokens': result['tokens'],
@@ -166,9 +189,27 @@ class MeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        """Retourne le profil de l'utilisateur connecté."""
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        """
+        Retourne le profil de l'utilisateur connecté.
+
+        Le profil change rarement mais les SPA le re-demandent souvent :
+        un ETag fort (hachage du contenu — User n'a pas de updated_at)
+        permet au client de sauter le corps de réponse avec un 304, et
+        Cache-Control: private autorise 30 s de cache navigateur sans
+        passer par un cache partagé.
+        """
+        payload = UserSerializer(request.user).data
+        body    = json.dumps(payload, sort_keys=True, default=str)
+        etag    = f'"{hashlib.blake2b(body.encode(), digest_size=16).hexdigest()}"'
+
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = Response(payload)
+
+        response['ETag']          = etag
+        response['Cache-Control'] = 'private, max-age=30'
+        return response
 
     def put(self, request):
         """Met à jour les informations du profil."""
@@ -214,8 +255,24 @@ class PasswordChangeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        request.user.set_password(serializer.validated_data['new_password'])
-        request.user.save()
+        user = request.user
+        user.set_password(serializer.validated_data['new_password'])
+        user.password_changed_at = timezone.now()
+        # UPDATE ciblé : pas de réécriture de toutes les colonnes
+        user.save(update_fields=['password', 'password_changed_at'])
+
+        # Révoquer les refresh tokens émis avant le changement : un
+        # token volé ne doit pas survivre au nouveau mot de passe.
+        # check_blacklist() ne consulte que BlacklistedToken, donc on
+        # blackliste (une requête pour tout le lot) au lieu de supprimer
+        # les OutstandingToken, ce qui ne révoquerait rien
+        BlacklistedToken.objects.bulk_create(
+            [
+                BlacklistedToken(token=token)
+                for token in OutstandingToken.objects.filter(user=user)
+            ],
+            ignore_conflicts=True,
+        )
 
         return Response(
             {'message': 'Mot de passe modifié avec succès.'},
@@ -275,16 +332,19 @@ class MFAConfirmView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        device_id = request.data.get('device_id')
-        code      = request.data.get('code')
+        serializer = MFAConfirmSerializer(data=request.data)
 
-        if not device_id or not code:
+        if not serializer.is_valid():
             return Response(
-                {'error': 'device_id et code sont requis.'},
+                serializer.errors,
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        success = MFAService.confirm_mfa_setup(request.user, device_id, code)
+        success = MFAService.confirm_mfa_setup(
+            request.user,
+            str(serializer.validated_data['device_id']),
+            serializer.validated_data['code'],
+        )
 
         if not success:
             return Response(
@@ -314,11 +374,26 @@ class MFAVerifyView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        user_id = request.data.get('user_id')
-        code    = request.data.get('code')
+        serializer = MFALoginVerifySerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user_id = serializer.validated_data['user_id']
+        code    = serializer.validated_data['code']
 
         try:
-            user = User.objects.get(id=user_id, is_active=True)
+            # Mêmes colonnes que le chemin de login : ce que la
+            # vérification MFA et UserSerializer consomment, rien d'autre
+            user = User.objects.only(
+                'id', 'public_id', 'email', 'first_name', 'last_name',
+                'role', 'is_active', 'mfa_enabled', 'email_verified',
+                'electrical_certified', 'avatar', 'locked_until',
+                'date_joined', 'last_login',
+            ).get(public_id=user_id, is_active=True)
         except User.DoesNotExist:
             return Response(
                 {'error': 'Utilisateur invalide.'},
@@ -376,6 +451,13 @@ class MFADisableView(APIView):
 # SSO (Single Sign-On)
 # ============================================================
 
+# Signataire de l'état anti-CSRF du SSO : cookie signé + horodaté,
+# aucune écriture session/BDD au départ du flux
+_SSO_STATE_SIGNER     = TimestampSigner(salt='authentication.sso.state')
+_SSO_STATE_COOKIE     = 'sso_state'
+_SSO_STATE_MAX_AGE_S  = 600
+
+
 class MicrosoftSSOView(APIView):
     """
     GET /api/v1/auth/sso/microsoft/
@@ -385,10 +467,19 @@ class MicrosoftSSOView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        import secrets
-        state   = secrets.token_urlsafe(32)
+        state    = secrets.token_urlsafe(32)
         auth_url = SSOService.get_microsoft_auth_url(state)
-        return Response({'auth_url': auth_url})
+
+        response = Response({'auth_url': auth_url})
+        response.set_cookie(
+            _SSO_STATE_COOKIE,
+            _SSO_STATE_SIGNER.sign(state),
+            max_age=_SSO_STATE_MAX_AGE_S,
+            httponly=True,
+            secure=not django_settings.DEBUG,
+            samesite='Lax',
+        )
+        return response
 
 
 class MicrosoftCallbackView(APIView):
@@ -400,7 +491,8 @@ class MicrosoftCallbackView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        code = request.query_params.get('code')
+        code  = request.query_params.get('code')
+        state = request.query_params.get('state', '')
 
         if not code:
             return Response(
@@ -408,13 +500,34 @@ class MicrosoftCallbackView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Vérification anti-CSRF stateless : l'état attendu vient du
+        # cookie signé posé au départ du flux, pas d'une session en BDD
+        try:
+            expected = _SSO_STATE_SIGNER.unsign(
+                request.COOKIES.get(_SSO_STATE_COOKIE, ''),
+                max_age=_SSO_STATE_MAX_AGE_S,
+            )
+        except BadSignature:
+            return Response(
+                {'error': 'État SSO invalide ou expiré.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not hmac.compare_digest(expected, state):
+            return Response(
+                {'error': 'État SSO invalide ou expiré.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
             result = SSOService.handle_microsoft_callback(code, request)
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({
-            'user':    UserSerializer(result['user']).data,
+        response = Response({
+            'user':    result['user_data'],  # déjà sérialisé par le service
             'tokens':  result['tokens'],
             'created': result['created'],
-        })
\ No newline at end of file
+        })
+        response.delete_cookie(_SSO_STATE_COOKIE)
+        return response
\ No newline at end of file
@@ -1,12 +1,43 @@
+from django import forms
 from django.contrib import admin
+
+from core.validators import validate_mac_address
 from .models import Device, DevicePort, DeviceVulnerability, DeviceScan
 
 
+class DeviceAdminForm(forms.ModelForm):
+    """Expose la MAC (stockée en binaire) sous sa forme texte."""
+    mac_address = forms.CharField(
+        required=False,
+        validators=[validate_mac_address],
+        label="Adresse MAC",
+        help_text="Format : 00:1A:2B:3C:4D:5E",
+    )
+
+    class Meta:
+        model  = Device
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['mac_address'].initial = self.instance.mac_address
+
+    def save(self, commit=True):
+        self.instance.mac_address = self.cleaned_data.get('mac_address', '')
+        return super().save(commit)
+
+
 class DevicePortInline(admin.TabularInline):
     model   = DevicePort
     extra   = 0
     fields  = ['port_number', 'protocol', 'state', 'service', 'is_authorized', 'last_seen']
 
+    def get_queryset(self, request):
+        # __str__ lit device.ip_address : sans select_related, chaque
+        # ligne de l'inline re-chargeait le Device parent (N+1)
+        return super().get_queryset(request).select_related('device')
+
 
 class DeviceVulnerabilityInline(admin.TabularInline):
     model   = DeviceVulnerability
@@ -14,6 +45,10 @@ class DeviceVulnerabilityInline(admin.TabularInline):
     fields  = ['cve_id', 'cvss_score', 'severity', 'title', 'status', 'patched_at']
     readonly_fields = ['patched_at']
 
+    def get_queryset(self, request):
+        # __str__ lit device.reference (même N+1 que DevicePortInline)
+        return super().get_queryset(request).select_related('device')
+
 
 @admin.register(Device)
 class DeviceAdmin(admin.ModelAdmin):
@@ -23,8 +58,10 @@ class DeviceAdmin(admin.ModelAdmin):
         'open_vulnerabilities_count', 'unauthorized_ports_count',
         'last_seen'
     ]
+    form          = DeviceAdminForm
     list_filter   = ['device_type', 'status', 'criticality', 'is_monitored', 'vlan']
-    search_fields = ['reference', 'name', 'ip_address', 'mac_address', 'hostname']
+    # mac_address est binaire en base : plus de recherche texte dessus
+    search_fields = ['reference', 'name', 'ip_address', 'hostname']
     inlines       = [DevicePortInline, DeviceVulnerabilityInline]
     readonly_fields = ['last_seen', 'last_scan', 'created_at', 'updated_at']
 
@@ -57,4 +94,8 @@ class DeviceScanAdmin(admin.ModelAdmin):
                      'ports_found', 'vulnerabilities_found', 'critical_vulns_found']
     list_filter   = ['scan_type', 'result']
     search_fields = ['device__reference', 'device__ip_address']
-    readonly_fields = ['started_at', 'completed_at']
\ No newline at end of file
+    readonly_fields = ['started_at', 'completed_at']
+
+    def get_queryset(self, request):
+        # Ne jamais charger les payloads compressés dans les listes
+        return super().get_queryset(request).defer('scan_data_blob')
\ No newline at end of file
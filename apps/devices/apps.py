@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class DevicesConfig(AppConfig):
     name         = 'apps.devices'
     verbose_name = '🖥️ Équipements & Supervision'
-    default_auto_field = 'django.db.models.BigAutoField'
\ No newline at end of file
+    default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        from . import signals  # noqa: F401 — branche les receivers
\ No newline at end of file
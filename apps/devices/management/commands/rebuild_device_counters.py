@@ -0,0 +1,46 @@
+"""
+Reconstruit les compteurs dénormalisés de Device depuis les tables
+de vérité (DeviceVulnerability et DevicePort).
+
+À lancer si les compteurs ont dérivé : suppressions en masse
+(_raw_delete, bulk_create) qui court-circuitent save()/delete().
+
+Usage :
+    python manage.py rebuild_device_counters
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.devices.models import Device, DevicePort, DeviceVulnerability
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs dénormalisés des équipements"
+
+    def handle(self, *args, **options):
+        # Deux sous-requêtes corrélées : un seul UPDATE couvre toute la
+        # table, sans matérialiser les équipements en Python
+        vuln_sq = Subquery(
+            DeviceVulnerability.objects.filter(
+                device=OuterRef('pk'),
+                status__in=DeviceVulnerability._COUNTED_STATUSES,
+            ).order_by().values('device').annotate(c=Count('pk')).values('c')
+        )
+        port_sq = Subquery(
+            DevicePort.objects.filter(
+                device=OuterRef('pk'),
+                state=DevicePort.STATE_OPEN,
+                is_authorized=False,
+            ).order_by().values('device').annotate(c=Count('pk')).values('c')
+        )
+
+        updated = Device.objects.update(
+            open_vulnerabilities_count=Coalesce(vuln_sq, 0),
+            unauthorized_ports_count=Coalesce(port_sq, 0),
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Compteurs reconstruits pour {updated} équipement(s)."
+        ))
@@ -0,0 +1,59 @@
+# Écrite à la main : ajout des compteurs dénormalisés + remplissage
+# initial depuis les tables de vérité (vulnérabilités et ports).
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _backfill_counters(apps, schema_editor):
+    """Calcule les compteurs existants en deux sous-requêtes corrélées."""
+    Device              = apps.get_model('devices', 'Device')
+    DevicePort          = apps.get_model('devices', 'DevicePort')
+    DeviceVulnerability = apps.get_model('devices', 'DeviceVulnerability')
+
+    vuln_sq = Subquery(
+        DeviceVulnerability.objects.filter(
+            device=OuterRef('pk'),
+            status__in=['open', 'in_progress'],
+        ).order_by().values('device').annotate(c=Count('pk')).values('c')
+    )
+    port_sq = Subquery(
+        DevicePort.objects.filter(
+            device=OuterRef('pk'),
+            state='open',
+            is_authorized=False,
+        ).order_by().values('device').annotate(c=Count('pk')).values('c')
+    )
+
+    Device.objects.update(
+        open_vulnerabilities_count=Coalesce(vuln_sq, 0),
+        unauthorized_ports_count=Coalesce(port_sq, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0002_devicevulnerability_instance_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="device",
+            name="open_vulnerabilities_count",
+            field=models.PositiveIntegerField(
+                db_index=True,
+                default=0,
+                verbose_name="Vulnérabilités ouvertes (compteur)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="device",
+            name="unauthorized_ports_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Ports non autorisés (compteur)"
+            ),
+        ),
+        migrations.RunPython(_backfill_counters, migrations.RunPython.noop),
+    ]
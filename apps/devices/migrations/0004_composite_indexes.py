@@ -0,0 +1,47 @@
+# Generated by Django 5.2.17 on 2026-08-31 07:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0003_device_denormalized_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['device_type', 'status', 'criticality'], name='devices_dev_device__71ca91_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['is_monitored', 'status'], name='devices_dev_is_moni_c0d83f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['-last_seen'], name='devices_dev_last_se_0f47ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deviceport',
+            index=models.Index(fields=['device', 'state', 'is_authorized'], name='devices_dev_device__0fb325_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devicescan',
+            index=models.Index(fields=['device', '-started_at'], name='devices_dev_device__20ef6e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devicescan',
+            index=models.Index(fields=['scan_type', 'result', '-started_at'], name='devices_dev_scan_ty_4aa5c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devicevulnerability',
+            index=models.Index(fields=['status', '-cvss_score'], name='devices_dev_status_6dd36b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devicevulnerability',
+            index=models.Index(fields=['device', 'status'], name='devices_dev_device__284bbb_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Écrite à la main : la conversion texte → binaire doit s'exécuter
+# entre l'ajout de la colonne binaire et la suppression de l'ancienne.
+
+from django.db import migrations, models
+
+
+def _text_to_bytes(apps, schema_editor):
+    Device = apps.get_model('devices', 'Device')
+    for pk, mac in Device.objects.exclude(mac_address='').values_list('pk', 'mac_address'):
+        raw = bytes.fromhex(mac.replace(':', '').replace('-', ''))
+        Device.objects.filter(pk=pk).update(mac_address_raw=raw)
+
+
+def _bytes_to_text(apps, schema_editor):
+    Device = apps.get_model('devices', 'Device')
+    for pk, raw in Device.objects.exclude(mac_address_raw=None).values_list('pk', 'mac_address_raw'):
+        Device.objects.filter(pk=pk).update(mac_address=bytes(raw).hex(':', 1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0004_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="device",
+            name="mac_address_raw",
+            field=models.BinaryField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=6,
+                null=True,
+                verbose_name="Adresse MAC (binaire)",
+            ),
+        ),
+        migrations.RunPython(_text_to_bytes, _bytes_to_text),
+        migrations.RemoveField(
+            model_name="device",
+            name="mac_address",
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-08-31 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0005_device_mac_address_binary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='devicescan',
+            name='scan_data_blob',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Données du scan (compressées)'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.17 on 2026-08-31 07:27
+
+import core.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0006_devicescan_scan_data_blob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='devicevulnerability',
+            name='instance_id',
+            field=models.UUIDField(default=core.utils.uuid7, unique=True, verbose_name="ID d'instance unique"),
+        ),
+    ]
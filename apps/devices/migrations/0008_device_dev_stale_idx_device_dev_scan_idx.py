@@ -0,0 +1,23 @@
+# Generated by Django 5.2.17 on 2026-08-31 07:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0007_instance_id_uuid7_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_deleted', False), ('is_monitored', True)), fields=['status', 'last_seen'], name='dev_stale_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_deleted', False), ('is_monitored', True)), fields=['last_scan'], name='dev_scan_idx'),
+        ),
+    ]
@@ -26,16 +26,22 @@ Exemple EPR2 :
     )
 """
 
+import json
+import zlib
+from bisect import bisect_right
+
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
-import uuid
 from core.models import ReferencedModel, BaseModel
+from core.utils import uuid7
 from core.constants import (
     DEVICE_TYPE_CHOICES, DEVICE_STATUS_CHOICES,
     DEVICE_TYPE_SERVER, DEVICE_STATUS_ONLINE,
     ANOMALY_SEVERITY_CHOICES, ANOMALY_SEVERITY_MEDIUM,
 )
-from core.validators import validate_ip_address, validate_mac_address, validate_port_number
+from core.validators import validate_ip_address, validate_port_number
 
 
 # ============================================================
@@ -77,11 +83,16 @@ class Device(ReferencedModel):
         unique=True,
         verbose_name="Adresse IP"
     )
-    mac_address = models.CharField(
-        max_length=17,
-        blank=True,
-        validators=[validate_mac_address],
-        verbose_name="Adresse MAC"
+    # MAC stockée sur 6 octets (48 bits) au lieu du texte
+    # « 00:1A:2B:3C:4D:5E » (17 octets) : lignes et index plus compacts.
+    # L'API et l'admin continuent d'échanger la forme texte via la
+    # propriété mac_address ci-dessous.
+    mac_address_raw = models.BinaryField(
+        max_length=6,
+        null=True, blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="Adresse MAC (binaire)"
     )
     hostname = models.CharField(
         max_length=255,
@@ -182,6 +193,21 @@ class Device(ReferencedModel):
         verbose_name="Intervalle de ping (secondes)"
     )
 
+    # --- Compteurs dénormalisés ---
+    # Maintenus en delta atomique (F() + n) par DevicePort.save()/delete()
+    # et DeviceVulnerability.save()/delete(). Évite un COUNT(*) par ligne
+    # sur les pages de liste (admin, API). En cas de dérive (bulk_create,
+    # _raw_delete...), reconstruire avec : manage.py rebuild_device_counters
+    open_vulnerabilities_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        verbose_name="Vulnérabilités ouvertes (compteur)"
+    )
+    unauthorized_ports_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Ports non autorisés (compteur)"
+    )
+
     # --- Criticité ---
     CRITICALITY_LOW      = 'low'
     CRITICALITY_MEDIUM   = 'medium'
@@ -215,6 +241,30 @@ class Device(ReferencedModel):
         verbose_name        = "Équipement"
         verbose_name_plural = "Équipements"
         ordering            = ['reference']
+        # Index composites calqués sur les list_filter de l'admin et les
+        # tris fréquents (un index mono-colonne ne sert qu'un filtre seul)
+        indexes             = [
+            models.Index(fields=['device_type', 'status', 'criticality']),
+            models.Index(fields=['is_monitored', 'status']),
+            models.Index(fields=['-last_seen']),
+            # Index partiels pour les tâches périodiques : seuls les
+            # équipements supervisés actifs sont balayés, la condition
+            # garde l'index petit et le parcours devient un range scan
+            models.Index(
+                fields=['status', 'last_seen'],
+                name='dev_stale_idx',
+                condition=models.Q(
+                    is_active=True, is_deleted=False, is_monitored=True
+                ),
+            ),
+            models.Index(
+                fields=['last_scan'],
+                name='dev_scan_idx',
+                condition=models.Q(
+                    is_active=True, is_deleted=False, is_monitored=True
+                ),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.reference} — {self.name} ({self.ip_address})"
@@ -224,13 +274,22 @@ class Device(ReferencedModel):
         return self.status == DEVICE_STATUS_ONLINE
 
     @property
-    def open_vulnerabilities_count(self):
-        return self.vulnerabilities.filter(
-            status__in=[
-                DeviceVulnerability.STATUS_OPEN,
-                DeviceVulnerability.STATUS_IN_PROGRESS
-            ]
-        ).count()
+    def mac_address(self) -> str:
+        """Forme texte canonique « 00:1a:2b:3c:4d:5e » (vide si absente)."""
+        if not self.mac_address_raw:
+            return ''
+        return bytes(self.mac_address_raw).hex(':', 1)
+
+    @mac_address.setter
+    def mac_address(self, value: str):
+        self.mac_address_raw = self.mac_to_bytes(value)
+
+    @staticmethod
+    def mac_to_bytes(value: str):
+        """Parse « 00:1A-2B... » en 6 octets (None si chaîne vide)."""
+        if not value:
+            return None
+        return bytes.fromhex(value.replace(':', '').replace('-', ''))
 
     @property
     def critical_vulnerabilities_count(self):
@@ -239,13 +298,6 @@ class Device(ReferencedModel):
             status=DeviceVulnerability.STATUS_OPEN
         ).count()
 
-    @property
-    def unauthorized_ports_count(self):
-        return self.ports.filter(
-            state=DevicePort.STATE_OPEN,
-            is_authorized=False
-        ).count()
-
     def mark_online(self):
         """Marque l'équipement comme en ligne."""
         self.status    = DEVICE_STATUS_ONLINE
@@ -259,6 +311,22 @@ class Device(ReferencedModel):
         self.save(update_fields=['status'])
 
 
+def _bump_device_counter(device_id, field: str, delta: int) -> None:
+    """
+    Applique un delta atomique à un compteur dénormalisé de Device.
+
+    Greatest(..., 0) : un compteur qui aurait dérivé (ex. suppression en
+    masse sans passer par delete()) ne peut pas violer la contrainte
+    CHECK >= 0 de PositiveIntegerField — il plafonne à zéro en attendant
+    un rebuild_device_counters.
+    """
+    if not delta:
+        return
+    Device.objects.filter(pk=device_id).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
 # ============================================================
 # MODÈLE 2 : PORT RÉSEAU
 # ============================================================
@@ -349,11 +417,41 @@ class DevicePort(BaseModel):
         verbose_name_plural = "Ports réseau"
         unique_together     = [('device', 'port_number', 'protocol')]
         ordering            = ['device', 'port_number']
+        indexes             = [
+            # Chemin chaud des alertes : ports ouverts non autorisés
+            models.Index(fields=['device', 'state', 'is_authorized']),
+        ]
 
     def __str__(self):
         auth = "✅" if self.is_authorized else "⚠️"
         return f"{self.device.ip_address}:{self.port_number}/{self.protocol} {auth}"
 
+    def _counts_as_unauthorized(self) -> bool:
+        return self.state == self.STATE_OPEN and not self.is_authorized
+
+    def save(self, *args, **kwargs):
+        """Maintient Device.unauthorized_ports_count (delta atomique)."""
+        counted = self._counts_as_unauthorized()
+        if self._state.adding:
+            delta = 1 if counted else 0
+        else:
+            old = DevicePort.objects.filter(pk=self.pk).values_list(
+                'state', 'is_authorized'
+            ).first()
+            old_counted = (
+                old is not None and old[0] == self.STATE_OPEN and not old[1]
+            )
+            delta = int(counted) - int(old_counted)
+        super().save(*args, **kwargs)
+        _bump_device_counter(self.device_id, 'unauthorized_ports_count', delta)
+
+    def delete(self, *args, **kwargs):
+        counted = self._counts_as_unauthorized()
+        result  = super().delete(*args, **kwargs)
+        if counted:
+            _bump_device_counter(self.device_id, 'unauthorized_ports_count', -1)
+        return result
+
 
 # ============================================================
 # MODÈLE 3 : VULNÉRABILITÉ CVE
@@ -414,8 +512,10 @@ class DeviceVulnerability(BaseModel):
         verbose_name="Identifiant CVE",
         help_text="Ex: CVE-2024-1234"
     )
+    # uuid7 (ordonné par le temps) : les insertions restent en fin
+    # d'index unique, pas d'éclatement de pages aléatoire en ingestion
     instance_id = models.UUIDField(
-        default=uuid.uuid4,
+        default=uuid7,
         unique=True,
         verbose_name="ID d'instance unique"
     )
@@ -477,20 +577,61 @@ class DeviceVulnerability(BaseModel):
         verbose_name_plural = "Vulnérabilités"
         unique_together     = [('device', 'cve_id')]
         ordering            = ['-cvss_score', 'status']
+        indexes             = [
+            # Filtre admin severity/status + tri par score par défaut
+            models.Index(fields=['status', '-cvss_score']),
+            models.Index(fields=['device', 'status']),
+        ]
 
     def __str__(self):
         return f"{self.device.reference} — {self.cve_id} ({self.severity})"
 
+    # Seuils CVSS (bornes basses incluses) et échelle correspondante :
+    # < 4.0 LOW, >= 4.0 MEDIUM, >= 7.0 HIGH, >= 9.0 CRITICAL
+    SEVERITY_THRESHOLDS = (4.0, 7.0, 9.0)
+    _SEVERITY_LADDER    = (
+        SEVERITY_LOW, SEVERITY_MEDIUM, SEVERITY_HIGH, SEVERITY_CRITICAL,
+    )
+
     @classmethod
     def severity_from_score(cls, score: float) -> str:
         """Détermine la sévérité depuis le score CVSS."""
-        if score >= 9.0:
-            return cls.SEVERITY_CRITICAL
-        if score >= 7.0:
-            return cls.SEVERITY_HIGH
-        if score >= 4.0:
-            return cls.SEVERITY_MEDIUM
-        return cls.SEVERITY_LOW
+        return cls._SEVERITY_LADDER[bisect_right(cls.SEVERITY_THRESHOLDS, score)]
+
+    @classmethod
+    def severities_from_scores(cls, scores) -> list:
+        """
+        Classe une liste de scores en une passe (ingestion de scan).
+
+        bisect sur les seuils partagés : pas d'échelle de branches
+        Python ré-évaluée N fois pendant l'ingestion d'un lot de CVE.
+        """
+        thresholds, ladder = cls.SEVERITY_THRESHOLDS, cls._SEVERITY_LADDER
+        return [ladder[bisect_right(thresholds, s)] for s in scores]
+
+    # Statuts comptés dans Device.open_vulnerabilities_count
+    _COUNTED_STATUSES = (STATUS_OPEN, STATUS_IN_PROGRESS)
+
+    def save(self, *args, **kwargs):
+        """Maintient Device.open_vulnerabilities_count (delta atomique)."""
+        counted = self.status in self._COUNTED_STATUSES
+        if self._state.adding:
+            delta = 1 if counted else 0
+        else:
+            old = DeviceVulnerability.objects.filter(pk=self.pk).values_list(
+                'status', flat=True
+            ).first()
+            old_counted = old in self._COUNTED_STATUSES
+            delta = int(counted) - int(old_counted)
+        super().save(*args, **kwargs)
+        _bump_device_counter(self.device_id, 'open_vulnerabilities_count', delta)
+
+    def delete(self, *args, **kwargs):
+        counted = self.status in self._COUNTED_STATUSES
+        result  = super().delete(*args, **kwargs)
+        if counted:
+            _bump_device_counter(self.device_id, 'open_vulnerabilities_count', -1)
+        return result
 
 
 # ============================================================
@@ -558,11 +699,19 @@ class DeviceScan(BaseModel):
         verbose_name="Lancé par"
     )
 
-    # Résultats bruts JSON
+    # Résultats bruts JSON. Les gros payloads (> COMPRESSION_THRESHOLD
+    # octets sérialisés) partent compressés dans scan_data_blob et
+    # scan_data ne garde que le marqueur {'compressed': True} : la ligne
+    # reste étroite pour les listes triées par -started_at
     scan_data = models.JSONField(
         default=dict, blank=True,
         verbose_name="Données du scan"
     )
+    scan_data_blob = models.BinaryField(
+        null=True, blank=True,
+        editable=False,
+        verbose_name="Données du scan (compressées)"
+    )
 
     # Statistiques
     ports_found              = models.PositiveIntegerField(default=0)
@@ -577,10 +726,35 @@ class DeviceScan(BaseModel):
         verbose_name        = "Scan de sécurité"
         verbose_name_plural = "Scans de sécurité"
         ordering            = ['-started_at']
+        indexes             = [
+            # Historique d'un équipement (détail device, API scans)
+            models.Index(fields=['device', '-started_at']),
+            # Filtres admin type/résultat avec le tri -started_at
+            models.Index(fields=['scan_type', 'result', '-started_at']),
+        ]
 
     def __str__(self):
         return f"{self.device.reference} — {self.scan_type} — {self.started_at:%Y-%m-%d %H:%M}"
 
+    # Au-delà de cette taille sérialisée, le JSON part dans le blob
+    COMPRESSION_THRESHOLD = 4096
+
+    def save(self, *args, **kwargs):
+        """Compresse les gros scan_data avant écriture (zlib niveau 6)."""
+        if self.scan_data and not self.scan_data.get('compressed'):
+            payload = json.dumps(self.scan_data, default=str)
+            if len(payload) > self.COMPRESSION_THRESHOLD:
+                self.scan_data_blob = zlib.compress(payload.encode(), 6)
+                self.scan_data      = {'compressed': True}
+        super().save(*args, **kwargs)
+
+    @property
+    def full_scan_data(self) -> dict:
+        """Données complètes du scan, décompressées à la demande."""
+        if self.scan_data_blob:
+            return json.loads(zlib.decompress(bytes(self.scan_data_blob)))
+        return self.scan_data
+
     @property
     def duration_seconds(self):
         if self.completed_at and self.started_at:
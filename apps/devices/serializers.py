@@ -1,43 +1,69 @@
 """Serializers de l'application Devices."""
 
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
 from rest_framework import serializers
+
+from core import validators
+from core.mixins import CachedFieldsMixin, ChoiceLabelsMixin
 from .models import Device, DevicePort, DeviceVulnerability, DeviceScan
 
 
-class DevicePortSerializer(serializers.ModelSerializer):
-    state_label    = serializers.CharField(source='get_state_display', read_only=True)
-    protocol_label = serializers.CharField(source='get_protocol_display', read_only=True)
+# Classifieur de sévérité pré-résolu : l'ingestion en masse de CVE
+# appelle validate() par enregistrement, autant éviter la résolution
+# du descripteur classmethod à chaque fois (la table de seuils partagée
+# et le bisect vivent sur le modèle, source unique de vérité)
+_severity_from_score = DeviceVulnerability.severity_from_score
+
+
+def _iso(value):
+    """Formate un datetime comme DRF par défaut (ISO 8601, 'Z' pour UTC)."""
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    text = value.isoformat()
+    if text.endswith('+00:00'):
+        text = text[:-6] + 'Z'
+    return text
+
+
+class DevicePortSerializer(CachedFieldsMixin, ChoiceLabelsMixin,
+                           serializers.ModelSerializer):
+    # Les *_label sont injectés par ChoiceLabelsMixin (dicts précalculés)
+    choice_label_fields = ('protocol', 'state')
 
     class Meta:
         model  = DevicePort
         fields = [
-            'id', 'port_number', 'protocol', 'protocol_label',
-            'state', 'state_label', 'service', 'service_version',
+            'id', 'port_number', 'protocol',
+            'state', 'service', 'service_version',
             'is_authorized', 'first_seen', 'last_seen',
         ]
         read_only_fields = ['id', 'first_seen']
 
 
-class DeviceVulnerabilitySerializer(serializers.ModelSerializer):
-    severity_label = serializers.CharField(source='get_severity_display', read_only=True)
-    status_label   = serializers.CharField(source='get_status_display', read_only=True)
-    patched_by_name = serializers.SerializerMethodField()
+class DeviceVulnerabilitySerializer(CachedFieldsMixin, ChoiceLabelsMixin,
+                                    serializers.ModelSerializer):
+    choice_label_fields = ('severity', 'status')
+    # source pointé : résolu directement par DRF, sans le dispatch
+    # getattr + appel de méthode d'un SerializerMethodField par ligne
+    patched_by_name = serializers.CharField(
+        source='patched_by.full_name', default=None, read_only=True
+    )
 
     class Meta:
         model  = DeviceVulnerability
         fields = [
             'id', 'cve_id', 'cvss_score',
-            'severity', 'severity_label',
+            'severity',
             'title', 'description', 'affected_component', 'remediation',
-            'status', 'status_label',
+            'status',
             'patched_at', 'patched_by', 'patched_by_name',
             'acceptance_justification', 'detected_at',
         ]
         read_only_fields = ['id', 'detected_at']
 
-    def get_patched_by_name(self, obj):
-        return obj.patched_by.full_name if obj.patched_by else None
-
     def validate_cvss_score(self, value):
         if not (0.0 <= value <= 10.0):
             raise serializers.ValidationError("Le score CVSS doit être entre 0.0 et 10.0.")
@@ -46,22 +72,24 @@ class DeviceVulnerabilitySerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         # Auto-calculer la sévérité depuis le score
         if 'cvss_score' in attrs and 'severity' not in attrs:
-            attrs['severity'] = DeviceVulnerability.severity_from_score(attrs['cvss_score'])
+            attrs['severity'] = _severity_from_score(attrs['cvss_score'])
         return attrs
 
 
-class DeviceScanSerializer(serializers.ModelSerializer):
-    scan_type_label  = serializers.CharField(source='get_scan_type_display', read_only=True)
-    result_label     = serializers.CharField(source='get_result_display', read_only=True)
-    launched_by_name = serializers.SerializerMethodField()
+class DeviceScanSerializer(CachedFieldsMixin, ChoiceLabelsMixin,
+                           serializers.ModelSerializer):
+    choice_label_fields = ('scan_type', 'result')
+    launched_by_name = serializers.CharField(
+        source='launched_by.full_name', default='Automatique', read_only=True
+    )
     duration_seconds = serializers.FloatField(read_only=True)
 
     class Meta:
         model  = DeviceScan
         fields = [
-            'id', 'scan_type', 'scan_type_label',
+            'id', 'scan_type',
             'started_at', 'completed_at', 'duration_seconds',
-            'result', 'result_label',
+            'result',
             'launched_by', 'launched_by_name',
             'ports_found', 'open_ports_found', 'unauthorized_ports_found',
             'vulnerabilities_found', 'critical_vulns_found',
@@ -69,15 +97,22 @@ class DeviceScanSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'started_at']
 
-    def get_launched_by_name(self, obj):
-        return obj.launched_by.full_name if obj.launched_by else 'Automatique'
 
-
-class DeviceListSerializer(serializers.ModelSerializer):
+class DeviceListSerializer(CachedFieldsMixin, ChoiceLabelsMixin,
+                           serializers.ModelSerializer):
     """Version allégée pour les listes."""
-    device_type_label  = serializers.CharField(source='get_device_type_display', read_only=True)
-    status_label       = serializers.CharField(source='get_status_display', read_only=True)
-    criticality_label  = serializers.CharField(source='get_criticality_display', read_only=True)
+    choice_label_fields = ('device_type', 'status', 'criticality')
+
+    # Colonnes réellement sérialisées : tout le reste (description,
+    # firmware, localisation, alimentation…) reste en base
+    SELECT_ONLY = (
+        'id', 'reference', 'name', 'device_type',
+        'ip_address', 'hostname', 'vlan',
+        'status', 'criticality', 'is_monitored', 'last_seen',
+        'open_vulnerabilities_count', 'unauthorized_ports_count',
+        'is_active', 'created_at',
+    )
+
     open_vulnerabilities_count  = serializers.IntegerField(read_only=True)
     critical_vulnerabilities_count = serializers.IntegerField(read_only=True)
     unauthorized_ports_count    = serializers.IntegerField(read_only=True)
@@ -87,9 +122,9 @@ class DeviceListSerializer(serializers.ModelSerializer):
         model  = Device
         fields = [
             'id', 'reference', 'name',
-            'device_type', 'device_type_label',
+            'device_type',
             'ip_address', 'hostname', 'vlan',
-            'status', 'status_label', 'criticality', 'criticality_label',
+            'status', 'criticality',
             'is_monitored', 'last_seen',
             'open_vulnerabilities_count',
             'critical_vulnerabilities_count',
@@ -98,16 +133,72 @@ class DeviceListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """
+        Restreint les colonnes chargées à celles de la liste et annote
+        le compte de vulnérabilités critiques ouvertes — la propriété
+        du modèle coûterait une requête par équipement affiché.
+        """
+        return queryset.only(*cls.SELECT_ONLY).annotate(
+            critical_vulns=Count(
+                'vulnerabilities',
+                filter=Q(
+                    vulnerabilities__severity=DeviceVulnerability.SEVERITY_CRITICAL,
+                    vulnerabilities__status=DeviceVulnerability.STATUS_OPEN,
+                ),
+            )
+        )
+
+    def to_representation(self, instance):
+        # Chemin de sérialisation spécialisé : une liste peut contenir
+        # des centaines d'équipements et la boucle générique de DRF
+        # (parcours du dict de champs + dispatch par champ) domine alors
+        # le temps de réponse. Les accès sont explicités une fois pour
+        # toutes ; la sortie est identique au chemin générique.
+        # Annoté par setup_eager_loading ; la propriété (une requête)
+        # reste le repli pour une instance isolée
+        crit = getattr(instance, 'critical_vulns', None)
+        if crit is None:
+            crit = instance.critical_vulnerabilities_count
+        data = {
+            'id'          : str(instance.id),
+            'reference'   : instance.reference,
+            'name'        : instance.name,
+            'device_type' : instance.device_type,
+            'ip_address'  : instance.ip_address,
+            'hostname'    : instance.hostname,
+            'vlan'        : instance.vlan,
+            'status'      : instance.status,
+            'criticality' : instance.criticality,
+            'is_monitored': instance.is_monitored,
+            'last_seen'   : _iso(instance.last_seen),
+            'open_vulnerabilities_count'    : instance.open_vulnerabilities_count,
+            'critical_vulnerabilities_count': crit,
+            'unauthorized_ports_count'      : instance.unauthorized_ports_count,
+            'is_online'   : instance.is_online,
+            'is_active'   : instance.is_active,
+            'created_at'  : _iso(instance.created_at),
+        }
+        for attr, out_key, labels in self._label_maps():
+            value = getattr(instance, attr)
+            data[out_key] = labels.get(value, value)
+        return data
 
-class DeviceDetailSerializer(serializers.ModelSerializer):
+
+class DeviceDetailSerializer(CachedFieldsMixin, ChoiceLabelsMixin,
+                             serializers.ModelSerializer):
     """Version complète avec ports, vulnérabilités et scans récents."""
-    device_type_label = serializers.CharField(source='get_device_type_display', read_only=True)
-    status_label      = serializers.CharField(source='get_status_display', read_only=True)
-    criticality_label = serializers.CharField(source='get_criticality_display', read_only=True)
+    choice_label_fields = ('device_type', 'status', 'criticality')
+    # mac_address est une propriété du modèle (stockage binaire 6 octets) :
+    # champ déclaré explicitement, validé au format texte
+    mac_address       = serializers.CharField(required=False, allow_blank=True)
     ports             = DevicePortSerializer(many=True, read_only=True)
     vulnerabilities   = DeviceVulnerabilitySerializer(many=True, read_only=True)
     recent_scans      = serializers.SerializerMethodField()
-    owner_name        = serializers.SerializerMethodField()
+    owner_name        = serializers.CharField(
+        source='owner.full_name', default=None, read_only=True
+    )
     open_vulnerabilities_count    = serializers.IntegerField(read_only=True)
     critical_vulnerabilities_count = serializers.IntegerField(read_only=True)
     unauthorized_ports_count      = serializers.IntegerField(read_only=True)
@@ -117,8 +208,8 @@ class DeviceDetailSerializer(serializers.ModelSerializer):
         model  = Device
         fields = [
             'id', 'reference', 'name', 'description',
-            'device_type', 'device_type_label',
-            'status', 'status_label', 'criticality', 'criticality_label',
+            'device_type',
+            'status', 'criticality',
             'ip_address', 'mac_address', 'hostname', 'vlan', 'subnet',
             'manufacturer', 'model_name', 'os', 'firmware_version', 'serial_number',
             'location', 'building', 'room',
@@ -133,9 +224,40 @@ class DeviceDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'last_seen', 'last_scan']
 
-    def get_recent_scans(self, obj):
-        scans = obj.scans.order_by('-started_at')[:5]
-        return DeviceScanSerializer(scans, many=True).data
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """
+        Prépare les jointures/préchargements que ce serializer consomme.
 
-    def get_owner_name(self, obj):
-        return obj.owner.full_name if obj.owner else None
\ No newline at end of file
+        À appeler depuis la vue : tout ce que la sérialisation touche
+        (owner, ports, vulnérabilités + patched_by, 5 derniers scans
+        + launched_by) est chargé en un nombre fixe de requêtes, au lieu
+        d'une requête par relation et par instance.
+        """
+        return queryset.select_related('owner').prefetch_related(
+            'ports',
+            Prefetch(
+                'vulnerabilities',
+                queryset=DeviceVulnerability.objects.select_related('patched_by'),
+            ),
+            Prefetch(
+                'scans',
+                queryset=DeviceScan.objects.select_related('launched_by')
+                                           .order_by('-started_at')[:5],
+                to_attr='recent_scans_cache',
+            ),
+        )
+
+    def validate_mac_address(self, value):
+        if value:
+            validators.validate_mac_address(value)
+        return value
+
+    def get_recent_scans(self, obj):
+        # Préchargé par setup_eager_loading ; la requête directe reste
+        # le repli pour une instance isolée (réponse de création)
+        scans = getattr(obj, 'recent_scans_cache', None)
+        if scans is None:
+            scans = obj.scans.select_related('launched_by') \
+                             .order_by('-started_at')[:5]
+        return DeviceScanSerializer(scans, many=True).data
\ No newline at end of file
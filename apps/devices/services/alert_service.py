@@ -14,9 +14,24 @@ En production, les notifications seraient envoyées via :
 - Système SIEM (syslog, splunk)
 """
 
-from django.utils import timezone
+import logging
 from datetime import timedelta
 
+from django.utils import timezone
+
+from core.constants import DEVICE_STATUS_ONLINE, DEVICE_STATUS_OFFLINE
+from ..models import Device, DevicePort, DeviceVulnerability
+from ..tasks import send_notification_task, send_notification_batch_task
+
+logger = logging.getLogger('electrosecure.alerts')
+
+# Table de dispatch résolue une fois : évite le branchement + les
+# résolutions d'attributs du logger à chaque alerte
+_LOG_FNS = {
+    'critical': logger.critical,
+    'warning' : logger.warning,
+}
+
 
 class AlertService:
     """
@@ -31,18 +46,12 @@ class AlertService:
     # --------------------------------------------------------
 
     @staticmethod
-    def create_status_alert(device, new_status: str) -> None:
+    def _build_status_alert(device, new_status: str) -> tuple:
         """
-        Déclenche une alerte quand un équipement change de statut
-        vers OFFLINE ou FAULT.
-
-        Notifie :
-        - Le responsable de l'équipement (device.owner)
-        - Les ingénieurs du projet
-        - L'équipe d'astreinte si criticité HIGH/CRITICAL
+        Construit (title, message, severity) pour un changement de statut.
+        Factorisé pour que les alertes unitaires et les lots périodiques
+        partagent exactement le même contenu.
         """
-        from core.constants import DEVICE_STATUS_OFFLINE, DEVICE_STATUS_FAULT
-
         severity = 'warning'
         if device.criticality in ['high', 'critical']:
             severity = 'critical'
@@ -58,9 +67,24 @@ class AlertService:
                 f"\n→ Vérifier l'alimentation électrique."
             )
 
+        title = f"Équipement {new_status.upper()} : {device.reference}"
+        return title, message, severity
+
+    @staticmethod
+    def create_status_alert(device, new_status: str) -> None:
+        """
+        Déclenche une alerte quand un équipement change de statut
+        vers OFFLINE ou FAULT.
+
+        Notifie :
+        - Le responsable de l'équipement (device.owner)
+        - Les ingénieurs du projet
+        - L'équipe d'astreinte si criticité HIGH/CRITICAL
+        """
+        title, message, severity = AlertService._build_status_alert(device, new_status)
         AlertService._send_notification(
             device   = device,
-            title    = f"Équipement {new_status.upper()} : {device.reference}",
+            title    = title,
             message  = message,
             severity = severity,
         )
@@ -75,8 +99,6 @@ class AlertService:
         Alerte quand des ports non autorisés sont détectés.
         Toujours de sévérité CRITICAL — c'est une alerte cybersécurité.
         """
-        from ..models import DevicePort
-
         unauthorized_ports = DevicePort.objects.filter(
             device        = device,
             is_authorized = False,
@@ -108,8 +130,6 @@ class AlertService:
         """
         Alerte quand des vulnérabilités critiques sont découvertes.
         """
-        from ..models import DeviceVulnerability
-
         crit_vulns = DeviceVulnerability.objects.filter(
             device   = device,
             severity = DeviceVulnerability.SEVERITY_CRITICAL,
@@ -152,9 +172,6 @@ class AlertService:
         Returns:
             list : Équipements marqués offline
         """
-        from ..models import Device
-        from core.constants import DEVICE_STATUS_ONLINE, DEVICE_STATUS_OFFLINE
-
         threshold = timezone.now() - timedelta(minutes=timeout_minutes)
 
         # Équipements supervisés qui n'ont pas répondu récemment
@@ -168,12 +185,41 @@ class AlertService:
             last_seen__lt = threshold
         )
 
+        # Capturer les ids d'abord : le filtre porte sur status=ONLINE,
+        # l'UPDATE ci-dessous le rendrait vide au rechargement
+        stale_ids = list(stale_devices.values_list('id', flat=True))
+        if not stale_ids:
+            return []
+
+        # Un seul UPDATE pour tout le lot (au lieu d'un save() par device)
+        Device.objects.filter(id__in=stale_ids).update(status=DEVICE_STATUS_OFFLINE)
+
+        # Recharger uniquement ce que les alertes consomment, en
+        # streaming (curseur serveur) : la construction des alertes ne
+        # charge jamais plus de chunk_size lignes côté driver
+        reloaded = Device.objects.filter(id__in=stale_ids) \
+                                 .select_related('owner') \
+                                 .only(
+                                     'reference', 'name', 'ip_address',
+                                     'criticality', 'power_cable_ref',
+                                     'status', 'owner__email',
+                                 ).iterator(chunk_size=500)
+        # Un seul lot pour toutes les alertes : le worker enverra les
+        # emails sur une connexion SMTP partagée au lieu d'un handshake
+        # par équipement
         marked_offline = []
-        for device in stale_devices:
-            device.status = DEVICE_STATUS_OFFLINE
-            device.save(update_fields=['status'])
-            AlertService.create_status_alert(device, DEVICE_STATUS_OFFLINE)
+        batch = []
+        for device in reloaded:
             marked_offline.append(device)
+            title, message, severity = AlertService._build_status_alert(
+                device, DEVICE_STATUS_OFFLINE
+            )
+            AlertService._log_alert(title, message, severity)
+            if device.owner_id:
+                batch.append([str(device.id), title, message, severity])
+
+        if batch:
+            send_notification_batch_task.delay(batch)
 
         return marked_offline
 
@@ -183,10 +229,10 @@ class AlertService:
         Identifie les équipements qui n'ont pas été scannés depuis X jours.
         Retourne la liste pour planifier les scans manquants.
         """
-        from ..models import Device
-
         threshold = timezone.now() - timedelta(days=days)
 
+        # iterator() : les lignes arrivent par paquets de 500 (curseur
+        # serveur sur Postgres) au lieu d'un fetchall du parc complet
         return list(Device.objects.filter(
             is_monitored = True,
             is_active    = True,
@@ -194,7 +240,7 @@ class AlertService:
         ).filter(
             # Jamais scanné ou scan trop ancien
             last_scan__lt = threshold
-        ).order_by('last_scan'))
+        ).order_by('last_scan').iterator(chunk_size=500))
 
     # --------------------------------------------------------
     # ENVOI DE NOTIFICATION (à brancher sur le canal souhaité)
@@ -205,33 +251,22 @@ class AlertService:
         """
         Envoie une notification aux responsables.
 
-        En production, remplacer par :
-        - Email  : send_mail(subject=title, message=message, ...)
-        - Slack  : requests.post(SLACK_WEBHOOK, json={"text": message})
-        - SIEM   : logging.critical(message)
-
-        Pour l'instant, on log simplement.
+        Le log part immédiatement (canal SIEM) ; l'email au responsable
+        est délégué à une tâche Celery pour que l'appelant (changement
+        de statut, fin de scan) ne paye pas le handshake SMTP.
         """
-        import logging
-        logger = logging.getLogger('electrosecure.alerts')
+        AlertService._log_alert(title, message, severity)
+
+        # Notifier le responsable de l'équipement si défini
+        # (l'id suffit : la tâche recharge l'email côté worker)
+        if device.owner_id:
+            send_notification_task.delay(str(device.id), title, message, severity)
 
-        log_fn = logger.critical if severity == 'critical' else logger.warning
+    @staticmethod
+    def _log_alert(title: str, message: str, severity: str) -> None:
+        """Trace l'alerte dans le canal SIEM (synchrone, peu coûteux)."""
+        log_fn = _LOG_FNS.get(severity, logger.warning)
         log_fn(
             "[ALERT][%s] %s — %s",
             severity.upper(), title, message
-        )
-
-        # Notifier le responsable de l'équipement si défini
-        if device.owner and device.owner.email:
-            try:
-                from django.core.mail import send_mail
-                from django.conf import settings
-                send_mail(
-                    subject      = f"[ElectroSecure] {title}",
-                    message      = message,
-                    from_email   = settings.DEFAULT_FROM_EMAIL,
-                    recipient_list = [device.owner.email],
-                    fail_silently  = True,
-                )
-            except Exception:
-                pass  # Ne pas crasher si l'email échoue
\ No newline at end of file
+        )
\ No newline at end of file
@@ -2,11 +2,25 @@
 Service de gestion des équipements réseau.
 """
 
+from django.core.cache import cache
 from django.db.models import Count, Q
 from django.utils import timezone
 
+from core.constants import (
+    DEVICE_STATUS_ONLINE,
+    DEVICE_STATUS_OFFLINE,
+    DEVICE_STATUS_FAULT,
+)
 from core.exceptions import ConflictError, BusinessLogicError
-from ..models import Device
+from ..models import Device, DeviceVulnerability
+from .alert_service import AlertService
+
+# Cache court de la cartographie : le frontend de topologie sonde
+# l'endpoint en continu, l'état du parc change à l'échelle de la seconde.
+# L'invalidation passe par un numéro de version incrémenté à chaque
+# mutation d'équipement (pas de delete_pattern : portable sur locmem)
+_NETMAP_CACHE_TTL_S  = 5
+_NETMAP_VERSION_KEY  = 'netmap:version'
 
 
 class DeviceService:
@@ -25,12 +39,22 @@ class DeviceService:
         ip  = validated_data.get('ip_address')
         mac = validated_data.get('mac_address', '')
 
-        if Device.objects.filter(ip_address=ip, is_active=True).exists():
-            raise ConflictError(
-                f"Un équipement avec l'adresse IP {ip} existe déjà."
-            )
-
-        if mac and Device.objects.filter(mac_address=mac, is_active=True).exists():
+        # Une seule requête de pré-vérification (IP OU MAC) au lieu de
+        # deux exists() séquentiels : un aller-retour BDD de moins sur
+        # le chemin nominal
+        conflict_q = Q(ip_address=ip)
+        if mac:
+            conflict_q |= Q(mac_address_raw=Device.mac_to_bytes(mac))
+
+        conflict_ip = Device.objects.filter(
+            conflict_q, is_active=True
+        ).values_list('ip_address', flat=True).first()
+
+        if conflict_ip is not None:
+            if conflict_ip == ip:
+                raise ConflictError(
+                    f"Un équipement avec l'adresse IP {ip} existe déjà."
+                )
             raise ConflictError(
                 f"Un équipement avec l'adresse MAC {mac} existe déjà."
             )
@@ -47,13 +71,21 @@ class DeviceService:
         Met à jour le statut d'un équipement.
         Déclenche une alerte si passage vers OFFLINE ou FAULT.
         """
-        from core.constants import DEVICE_STATUS_OFFLINE, DEVICE_STATUS_FAULT
-        from .alert_service import AlertService
-
         old_status = device.status
+
+        # UPDATE ciblé sans repasser par Model.save() : pas de dispatch
+        # de signaux ni de re-validation, une seule requête sans SELECT
+        Device.objects.filter(pk=device.pk).update(
+            status     = new_status,
+            updated_by = user,
+            updated_at = timezone.now(),
+        )
         device.status     = new_status
         device.updated_by = user
-        device.save(update_fields=['status', 'updated_by'])
+
+        # post_save ne part pas sur un UPDATE de QuerySet : invalider
+        # la cartographie explicitement
+        DeviceService.invalidate_network_map_cache()
 
         # Alerter si dégradation du statut
         if new_status in [DEVICE_STATUS_OFFLINE, DEVICE_STATUS_FAULT]:
@@ -83,13 +115,24 @@ class DeviceService:
                 }
             }
         """
-        from core.constants import DEVICE_STATUS_ONLINE, DEVICE_STATUS_OFFLINE
+        version = cache.get_or_set(_NETMAP_VERSION_KEY, 1, timeout=None)
+        key     = f"netmap:{version}:{vlan if vlan is not None else 'all'}"
+        cached  = cache.get(key)
+        if cached is not None:
+            return cached
 
-        qs = Device.objects.filter(
+        base = Device.objects.filter(
             is_active=True,
             is_deleted=False,
             is_monitored=True,
-        ).annotate(
+        )
+        if vlan is not None:
+            base = base.filter(vlan=vlan)
+
+        # .values() : les lignes arrivent en dicts prêts à servir, sans
+        # hydrater une instance Device (ni descripteurs, ni __init__)
+        # par équipement — le gros du coût de la cartographie
+        rows = base.annotate(
             vuln_count=Count(
                 'vulnerabilities',
                 filter=Q(vulnerabilities__status='open')
@@ -98,43 +141,53 @@ class DeviceService:
                 'ports',
                 filter=Q(ports__is_authorized=False, ports__state='open')
             )
+        ).values(
+            'id', 'reference', 'name', 'ip_address', 'device_type',
+            'status', 'criticality', 'vlan', 'location', 'last_seen',
+            'vuln_count', 'unauth_ports',
         )
 
-        if vlan is not None:
-            qs = qs.filter(vlan=vlan)
-
-        devices = [
-            {
-                'id'          : str(d.id),
-                'reference'   : d.reference,
-                'name'        : d.name,
-                'ip_address'  : d.ip_address,
-                'device_type' : d.device_type,
-                'status'      : d.status,
-                'criticality' : d.criticality,
-                'vlan'        : d.vlan,
-                'location'    : d.location,
-                'vuln_count'  : d.vuln_count,
-                'unauth_ports': d.unauth_ports,
-                'last_seen'   : d.last_seen.isoformat() if d.last_seen else None,
-            }
-            for d in qs
-        ]
-
-        total   = qs.count()
-        online  = qs.filter(status=DEVICE_STATUS_ONLINE).count()
-        offline = qs.filter(status=DEVICE_STATUS_OFFLINE).count()
-        crit    = sum(1 for d in qs if d.vuln_count > 0 and d.criticality == 'critical')
-
-        return {
+        # Les stats se déduisent des lignes déjà chargées : une seule
+        # requête BDD pour toute la cartographie
+        devices = []
+        online  = 0
+        offline = 0
+        crit    = 0
+        for row in rows:
+            # Normalisation en place : on réutilise les dicts de values()
+            row['id']        = str(row['id'])
+            row['last_seen'] = row['last_seen'].isoformat() if row['last_seen'] else None
+            if row['status'] == DEVICE_STATUS_ONLINE:
+                online += 1
+            elif row['status'] == DEVICE_STATUS_OFFLINE:
+                offline += 1
+            if row['vuln_count'] > 0 and row['criticality'] == 'critical':
+                crit += 1
+            devices.append(row)
+
+        result = {
             'devices': devices,
             'stats'  : {
-                'total'              : total,
+                'total'              : len(devices),
                 'online'             : online,
                 'offline'            : offline,
                 'critical_with_vulns': crit,
             }
         }
+        cache.set(key, result, timeout=_NETMAP_CACHE_TTL_S)
+        return result
+
+    @staticmethod
+    def invalidate_network_map_cache() -> None:
+        """
+        Invalide toutes les variantes (par VLAN) de la cartographie en
+        cache en incrémentant le numéro de version : les anciennes clés
+        deviennent inaccessibles et expirent d'elles-mêmes.
+        """
+        try:
+            cache.incr(_NETMAP_VERSION_KEY)
+        except ValueError:
+            cache.set(_NETMAP_VERSION_KEY, 1, timeout=None)
 
     # --------------------------------------------------------
     # STATISTIQUES GLOBALES
@@ -145,22 +198,31 @@ class DeviceService:
         """
         Statistiques globales pour le tableau de bord.
         """
-        from core.constants import DEVICE_STATUS_ONLINE
-        from ..models import DeviceVulnerability
-
-        devices = Device.objects.filter(is_active=True, is_deleted=False)
-        vulns   = DeviceVulnerability.objects.filter(status=DeviceVulnerability.STATUS_OPEN)
+        # Deux agrégats (un par table) au lieu de six .count() ; le
+        # compteur dénormalisé remplace l'ancien JOIN + DISTINCT sur
+        # les ports
+        device_stats = Device.objects.filter(
+            is_active=True, is_deleted=False
+        ).aggregate(
+            total    =Count('id'),
+            online   =Count('id', filter=Q(status=DEVICE_STATUS_ONLINE)),
+            monitored=Count('id', filter=Q(is_monitored=True)),
+            unauth   =Count('id', filter=Q(unauthorized_ports_count__gt=0)),
+        )
+        vuln_stats = DeviceVulnerability.objects.filter(
+            status=DeviceVulnerability.STATUS_OPEN
+        ).aggregate(
+            total   =Count('id'),
+            critical=Count('id', filter=Q(
+                severity=DeviceVulnerability.SEVERITY_CRITICAL
+            )),
+        )
 
         return {
-            'total_devices'        : devices.count(),
-            'online_devices'       : devices.filter(status=DEVICE_STATUS_ONLINE).count(),
-            'monitored_devices'    : devices.filter(is_monitored=True).count(),
-            'open_vulnerabilities' : vulns.count(),
-            'critical_vulns'       : vulns.filter(
-                severity=DeviceVulnerability.SEVERITY_CRITICAL
-            ).count(),
-            'devices_with_unauth_ports': Device.objects.filter(
-                ports__is_authorized=False,
-                ports__state='open'
-            ).distinct().count(),
+            'total_devices'        : device_stats['total'],
+            'online_devices'       : device_stats['online'],
+            'monitored_devices'    : device_stats['monitored'],
+            'open_vulnerabilities' : vuln_stats['total'],
+            'critical_vulns'       : vuln_stats['critical'],
+            'devices_with_unauth_ports': device_stats['unauth'],
         }
\ No newline at end of file
@@ -11,11 +11,20 @@ pour que le code soit fonctionnel sans dépendances externes.
 La structure est conçue pour être remplacée facilement par de vrais appels.
 """
 
+import errno
+import re
+import select
 import socket
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import lru_cache
+from types import MappingProxyType
+from django.db import connection, transaction
 from django.utils import timezone
 
+from core.constants import DEVICE_STATUS_ONLINE, DEVICE_STATUS_OFFLINE
 from ..models import Device, DevicePort, DeviceVulnerability, DeviceScan
 
 
@@ -28,8 +37,12 @@ class ScanService:
         scan    = service.run_full_scan(device, user=request.user)
     """
 
+    # Tables de référence figées à la définition de la classe :
+    # MappingProxyType interdit toute mutation accidentelle et les
+    # frozenset rendent les tests d'appartenance O(1) dans run_port_scan
+
     # Ports courants dans les installations industrielles
-    INDUSTRIAL_PORTS = {
+    INDUSTRIAL_PORTS = MappingProxyType({
         20 : ('ftp-data', 'tcp'),
         21 : ('ftp',      'tcp'),
         22 : ('ssh',      'tcp'),
@@ -43,21 +56,24 @@ class ScanService:
         4840:('opc-ua',   'tcp'),    # OPC-UA (standard industrie 4.0)
         20000:('dnp3',    'tcp'),    # DNP3 (SCADA)
         47808:('bacnet',  'udp'),    # BACnet (bâtiment)
-    }
+    })
 
     # Ports autorisés par défaut selon le type d'équipement
-    DEFAULT_AUTHORIZED_PORTS = {
-        'server'     : [22, 80, 443, 8080, 8443],
-        'switch'     : [22, 23, 80, 161, 443],
-        'iot'        : [80, 443, 8883],
-        'plc'        : [102, 502, 4840, 20000],
-        'printer'    : [80, 443, 515, 631, 9100],
-        'controller' : [102, 502, 4840],
-        'sensor'     : [80, 443, 502],
-    }
+    DEFAULT_AUTHORIZED_PORTS = MappingProxyType({
+        'server'     : frozenset({22, 80, 443, 8080, 8443}),
+        'switch'     : frozenset({22, 23, 80, 161, 443}),
+        'iot'        : frozenset({80, 443, 8883}),
+        'plc'        : frozenset({102, 502, 4840, 20000}),
+        'printer'    : frozenset({80, 443, 515, 631, 9100}),
+        'controller' : frozenset({102, 502, 4840}),
+        'sensor'     : frozenset({80, 443, 502}),
+    })
+
+    # Repli pour les types d'équipement inconnus
+    FALLBACK_AUTHORIZED_PORTS = frozenset({22, 80, 443})
 
     # Base CVE simulée par OS/firmware
-    KNOWN_CVES = {
+    KNOWN_CVES = MappingProxyType({
         'windows server 2019': [
             {
                 'cve_id'    : 'CVE-2021-34527',
@@ -94,7 +110,7 @@ class ScanService:
                 'fix'       : 'Désactiver l\'interface web ou appliquer le patch Cisco'
             },
         ],
-    }
+    })
 
     # --------------------------------------------------------
     # SCANS PRINCIPAUX
@@ -111,14 +127,15 @@ class ScanService:
             launched_by = user,
         )
 
+        new_status = None
         try:
             is_reachable = self._check_reachable(device.ip_address)
 
             if is_reachable:
-                device.mark_online()
+                new_status  = DEVICE_STATUS_ONLINE
                 result_data = {'reachable': True, 'latency_ms': random.uniform(0.5, 5.0)}
             else:
-                device.mark_offline()
+                new_status  = DEVICE_STATUS_OFFLINE
                 result_data = {'reachable': False}
 
             scan.result    = DeviceScan.RESULT_SUCCESS
@@ -129,9 +146,19 @@ class ScanService:
             scan.error_message = str(e)
 
         finally:
-            scan.completed_at = timezone.now()
-            device.last_scan  = timezone.now()
-            device.save(update_fields=['last_scan'])
+            # Un seul timestamp et un seul UPDATE : statut, last_seen et
+            # last_scan partent ensemble (mark_online + save séparé
+            # écrivaient l'équipement deux fois par ping)
+            now = timezone.now()
+            scan.completed_at = now
+            fields = {'last_scan': now}
+            if new_status is not None:
+                fields['status'] = new_status
+                if new_status == DEVICE_STATUS_ONLINE:
+                    fields['last_seen'] = now
+            Device.objects.filter(pk=device.pk).update(**fields)
+            for attr, value in fields.items():
+                setattr(device, attr, value)
             scan.save()
 
         return scan
@@ -152,38 +179,77 @@ class ScanService:
             open_ports = self._discover_ports(device)
 
             authorized_ports = self.DEFAULT_AUTHORIZED_PORTS.get(
-                device.device_type, [22, 80, 443]
+                device.device_type, self.FALLBACK_AUTHORIZED_PORTS
             )
 
-            ports_created    = 0
-            unauthorized     = 0
+            # État connu des ports de l'équipement : sur un parc stable,
+            # la plupart des scans retrouvent exactement les mêmes ports
+            # et l'upsert n'a rien à écrire
+            existing = {
+                (row['port_number'], row['protocol']):
+                    (row['id'], row['state'], row['service'], row['is_authorized'])
+                for row in device.ports.values(
+                    'id', 'port_number', 'protocol',
+                    'state', 'service', 'is_authorized',
+                )
+            }
+
+            now          = timezone.now()
+            unauthorized = 0
+            rows         = []
+            unchanged    = []
 
             for port_num, protocol in open_ports:
                 service, _ = self.INDUSTRIAL_PORTS.get(port_num, ('unknown', 'tcp'))
                 is_auth    = port_num in authorized_ports
-
-                DevicePort.objects.update_or_create(
-                    device      = device,
-                    port_number = port_num,
-                    protocol    = protocol,
-                    defaults    = {
-                        'state'        : DevicePort.STATE_OPEN,
-                        'service'      : service,
-                        'is_authorized': is_auth,
-                        'last_seen'    : timezone.now(),
-                    }
-                )
-                ports_created += 1
                 if not is_auth:
                     unauthorized += 1
 
+                # Port déjà connu à l'identique : simple bump de last_seen
+                known = existing.get((port_num, protocol))
+                if known and known[1:] == (DevicePort.STATE_OPEN, service, is_auth):
+                    unchanged.append(known[0])
+                    continue
+
+                rows.append(DevicePort(
+                    device        = device,
+                    port_number   = port_num,
+                    protocol      = protocol,
+                    state         = DevicePort.STATE_OPEN,
+                    service       = service,
+                    is_authorized = is_auth,
+                    last_seen     = now,
+                ))
+
+            # Un seul INSERT ... ON CONFLICT DO UPDATE pour les seuls
+            # ports nouveaux ou modifiés, au lieu de réécrire toute la
+            # table à chaque scan. bulk_create court-circuite
+            # DevicePort.save() : le compteur dénormalisé est
+            # resynchronisé dans la même transaction.
+            if rows:
+                with transaction.atomic():
+                    DevicePort.objects.bulk_create(
+                        rows,
+                        update_conflicts=True,
+                        unique_fields=['device', 'port_number', 'protocol'],
+                        update_fields=['state', 'service', 'is_authorized', 'last_seen'],
+                    )
+                    self._sync_unauthorized_ports_counter(device)
+
+            # Les ports inchangés ne repassent pas par l'upsert : un seul
+            # UPDATE groupé, ciblé par pk (un même numéro de port peut
+            # exister en tcp ET en udp), rafraîchit leur horodatage
+            if unchanged:
+                DevicePort.objects.filter(pk__in=unchanged) \
+                                  .update(last_seen=now)
+
             # Alerter sur les ports non autorisés
             if unauthorized > 0:
                 from .alert_service import AlertService
                 AlertService.create_unauthorized_port_alert(device, unauthorized)
 
-            scan.ports_found              = ports_created
-            scan.open_ports_found         = ports_created
+            scan.ports_found              = len(open_ports)
+            scan.open_ports_found         = len(open_ports)
             scan.unauthorized_ports_found = unauthorized
             scan.result    = DeviceScan.RESULT_SUCCESS
             scan.scan_data = {'open_ports': [p for p, _ in open_ports]}
@@ -211,27 +277,48 @@ class ScanService:
 
         try:
             cves_found = self._lookup_cves(device)
-            vuln_count = 0
-            crit_count = 0
-
-            for cve_data in cves_found:
-                severity = DeviceVulnerability.severity_from_score(cve_data['score'])
-
-                DeviceVulnerability.objects.get_or_create(
-                    device = device,
-                    cve_id = cve_data['cve_id'],
-                    defaults={
-                        'cvss_score'         : cve_data['score'],
-                        'severity'           : severity,
-                        'title'              : cve_data['title'],
-                        'affected_component' : cve_data['component'],
-                        'remediation'        : cve_data['fix'],
-                        'status'             : DeviceVulnerability.STATUS_OPEN,
-                    }
+
+            # Ne construire que les CVE inconnues de cet équipement :
+            # inutile d'envoyer à la base des lignes qu'ON CONFLICT
+            # rejettera de toute façon
+            known_cves = set(
+                device.vulnerabilities.values_list('cve_id', flat=True)
+            )
+
+            # Classement du lot entier en une passe (cf. severities_from_scores)
+            severities = DeviceVulnerability.severities_from_scores(
+                [c['score'] for c in cves_found]
+            )
+
+            rows = [
+                DeviceVulnerability(
+                    device             = device,
+                    cve_id             = cve_data['cve_id'],
+                    cvss_score         = cve_data['score'],
+                    severity           = severity,
+                    title              = cve_data['title'],
+                    affected_component = cve_data['component'],
+                    remediation        = cve_data['fix'],
+                    status             = DeviceVulnerability.STATUS_OPEN,
                 )
-                vuln_count += 1
-                if severity == DeviceVulnerability.SEVERITY_CRITICAL:
-                    crit_count += 1
+                for cve_data, severity in zip(cves_found, severities)
+                if cve_data['cve_id'] not in known_cves
+            ]
+            vuln_count = len(cves_found)
+            crit_count = sum(
+                1 for s in severities
+                if s == DeviceVulnerability.SEVERITY_CRITICAL
+            )
+
+            # ignore_conflicts (et non update) : une CVE déjà connue garde
+            # son statut (patched/accepted ne doit pas repasser open).
+            # Même resynchronisation du compteur que pour les ports.
+            if rows:
+                with transaction.atomic():
+                    DeviceVulnerability.objects.bulk_create(
+                        rows, ignore_conflicts=True, batch_size=500
+                    )
+                    self._sync_open_vulns_counter(device)
 
             # Alerter si CVE critiques trouvées
             if crit_count > 0:
@@ -256,8 +343,12 @@ class ScanService:
     def run_full_scan(self, device: Device, user=None) -> DeviceScan:
         """
         Scan complet : ping + ports + vulnérabilités.
-        Lance les trois scans séquentiellement.
         Retourne un scan synthétique avec tous les résultats.
+
+        Les trois sous-scans sont indépendants (le ping sonde la cible,
+        ports et CVE n'écrivent que leurs propres tables) : lancés de
+        front, le scan complet dure le max des trois au lieu de leur
+        somme — le ping et son timeout réseau dominent.
         """
         full_scan = DeviceScan.objects.create(
             device      = device,
@@ -265,9 +356,20 @@ class ScanService:
             launched_by = user,
         )
 
-        ping_scan = self.run_ping_scan(device)
-        port_scan = self.run_port_scan(device)
-        vuln_scan = self.run_vulnerability_scan(device)
+        def _run(sub_scan):
+            try:
+                return sub_scan(device)
+            finally:
+                # Chaque thread ouvre sa propre connexion Django
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            ping_future = pool.submit(_run, self.run_ping_scan)
+            port_future = pool.submit(_run, self.run_port_scan)
+            vuln_future = pool.submit(_run, self.run_vulnerability_scan)
+            ping_scan   = ping_future.result()
+            port_scan   = port_future.result()
+            vuln_scan   = vuln_future.result()
 
         all_success = all(
             s.result == DeviceScan.RESULT_SUCCESS
@@ -283,7 +385,8 @@ class ScanService:
         full_scan.unauthorized_ports_found = port_scan.unauthorized_ports_found
         full_scan.vulnerabilities_found    = vuln_scan.vulnerabilities_found
         full_scan.critical_vulns_found     = vuln_scan.critical_vulns_found
-        full_scan.completed_at             = timezone.now()
+        now = timezone.now()
+        full_scan.completed_at             = now
         full_scan.scan_data                = {
             'ping'  : ping_scan.scan_data,
             'ports' : port_scan.scan_data,
@@ -291,32 +394,88 @@ class ScanService:
         }
         full_scan.save()
 
-        device.last_scan = timezone.now()
-        device.save(update_fields=['last_scan'])
+        device.last_scan = now
+        Device.objects.filter(pk=device.pk).update(last_scan=now)
 
         return full_scan
 
+    # --------------------------------------------------------
+    # MÉTHODES PRIVÉES (compteurs dénormalisés)
+    # --------------------------------------------------------
+
+    @staticmethod
+    def _sync_unauthorized_ports_counter(device: Device) -> None:
+        """Recalcule le compteur de ports après un bulk_create."""
+        count = device.ports.filter(
+            state=DevicePort.STATE_OPEN,
+            is_authorized=False,
+        ).count()
+        Device.objects.filter(pk=device.pk).update(unauthorized_ports_count=count)
+
+    @staticmethod
+    def _sync_open_vulns_counter(device: Device) -> None:
+        """Recalcule le compteur de vulnérabilités après un bulk_create."""
+        count = device.vulnerabilities.filter(
+            status__in=DeviceVulnerability._COUNTED_STATUSES,
+        ).count()
+        Device.objects.filter(pk=device.pk).update(open_vulnerabilities_count=count)
+
     # --------------------------------------------------------
     # MÉTHODES PRIVÉES (simulées — à remplacer en production)
     # --------------------------------------------------------
 
+    # Ports sondés pour le test de joignabilité et timeout global
+    PROBE_PORTS     = (80, 443, 22)
+    PROBE_TIMEOUT_S = 1.0
+
     def _check_reachable(self, ip: str) -> bool:
         """
         Vérifie si une IP répond.
-        Simulation : tente une connexion TCP sur le port 80 ou 443.
+        Simulation : tente une connexion TCP sur les ports 80/443/22.
         En production : utiliser subprocess ping ou icmplib.
+
+        Les trois connexions partent en non-bloquant et un select()
+        unique attend la première qui aboutit : une seule attente
+        multiplexée de 1 s au pire (ni threads, ni trois connect
+        bloquants en série).
         """
-        for port in [80, 443, 22]:
-            try:
+        socks = []
+        try:
+            for port in self.PROBE_PORTS:
                 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(1)
-                result = sock.connect_ex((ip, port))
-                sock.close()
-                if result == 0:
-                    return True
-            except (socket.error, OSError):
-                continue
-        return False
+                sock.setblocking(False)
+                err = sock.connect_ex((ip, port))
+                if err == 0:
+                    socks.append(sock)
+                    return True  # Connexion immédiate (boucle locale)
+                if err in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                    socks.append(sock)
+                else:
+                    sock.close()
+
+            deadline = time.monotonic() + self.PROBE_TIMEOUT_S
+            pending  = list(socks)
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                _, writable, _ = select.select([], pending, [], remaining)
+                if not writable:
+                    return False  # Timeout du select
+                for sock in writable:
+                    # SO_ERROR == 0 : le connect asynchrone a abouti
+                    if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                        return True
+                    pending.remove(sock)
+            return False
+        except (socket.error, OSError):
+            return False
+        finally:
+            for sock in socks:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
 
     def _discover_ports(self, device: Device) -> list:
         """
@@ -327,10 +486,12 @@ class ScanService:
         Returns:
             list[tuple] : [(port_number, protocol), ...]
         """
-        base_ports = self.DEFAULT_AUTHORIZED_PORTS.get(device.device_type, [22, 80])
+        base_ports = self.DEFAULT_AUTHORIZED_PORTS.get(
+            device.device_type, frozenset({22, 80})
+        )
         # Simuler quelques ports supplémentaires aléatoirement
-        extra = [p for p in [23, 8080, 4444] if random.random() < 0.1]
-        all_ports = list(set(base_ports + extra))
+        extra     = [p for p in [23, 8080, 4444] if random.random() < 0.1]
+        all_ports = set(base_ports).union(extra)
         return [(p, 'tcp') for p in all_ports]
 
     def _lookup_cves(self, device: Device) -> list:
@@ -346,9 +507,28 @@ class ScanService:
         """
         if not device.os:
             return []
+        return list(_cves_for_os(device.os.lower()))
+
+
+# Union compilée des clés d'OS : une seule passe sur la chaîne d'OS
+# quelle que soit la taille de la base CVE, au lieu d'un test de
+# sous-chaîne par clé (recherche multi-motifs, style Aho-Corasick)
+_CVE_OS_PATTERN = re.compile(
+    '|'.join(re.escape(key) for key in ScanService.KNOWN_CVES)
+)
 
-        os_lower = device.os.lower()
-        for key, cves in self.KNOWN_CVES.items():
-            if key in os_lower:
-                return cves
-        return []
\ No newline at end of file
+
+@lru_cache(maxsize=256)
+def _cves_for_os(os_lower: str) -> tuple:
+    """
+    Résout les CVE connues pour une chaîne d'OS normalisée (minuscules).
+
+    Mémoïsé : un parc compte des milliers d'équipements mais une
+    poignée d'OS distincts — après le premier passage, le scan nocturne
+    ne paye plus que l'accès au cache au lieu du balayage des clés de
+    KNOWN_CVES. Retourne un tuple (hashable, immuable) pour le cache.
+    """
+    match = _CVE_OS_PATTERN.search(os_lower)
+    if match:
+        return tuple(ScanService.KNOWN_CVES[match.group(0)])
+    return ()
\ No newline at end of file
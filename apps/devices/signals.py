@@ -0,0 +1,19 @@
+"""
+Signaux de l'application Devices.
+
+Invalide le cache court de la cartographie réseau dès qu'un équipement
+change : les clients qui sondent l'endpoint revoient l'état frais au
+prochain appel, sans attendre l'expiration du TTL.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Device
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_delete, sender=Device)
+def invalidate_network_map(sender, **kwargs):
+    from .services.device_service import DeviceService
+    DeviceService.invalidate_network_map_cache()
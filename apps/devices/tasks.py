@@ -8,6 +8,7 @@ Ces tâches sont planifiées via config/celery.py :
 """
 
 import logging
+
 from celery import shared_task
 
 logger = logging.getLogger('electrosecure')
@@ -62,41 +63,152 @@ def check_unscanned_devices_task(self, days: int = 7):
         raise self.retry(exc=exc)
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=30, acks_late=True)
+def send_notification_task(self, device_id, title: str, message: str, severity: str):
+    """
+    Envoie l'email d'alerte au responsable hors du chemin de réponse.
+
+    Le handshake SMTP (100 à 500 ms) sortait du temps de réponse des
+    changements de statut ; acks_late garantit qu'un crash du worker
+    re-délivre le message plutôt que de perdre l'alerte.
+    Routée sur la file 'alerts' (voir CELERY_TASK_ROUTES).
+    """
+    from django.conf import settings
+    from django.core.mail import send_mail
+
+    from apps.devices.models import Device
+
+    # Re-charger uniquement l'email du responsable
+    owner_email = Device.objects.filter(pk=device_id).values_list(
+        'owner__email', flat=True
+    ).first()
+    if not owner_email:
+        return  # Équipement supprimé ou sans responsable, rien à envoyer
+
+    try:
+        send_mail(
+            subject        = f"[ElectroSecure] {title}",
+            message        = message,
+            from_email     = settings.DEFAULT_FROM_EMAIL,
+            recipient_list = [owner_email],
+            fail_silently  = False,
+        )
+    except Exception as exc:
+        logger.warning("[TASK] send_notification retry : %s", exc)
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30, acks_late=True)
+def send_notification_batch_task(self, items: list):
+    """
+    Envoie un lot d'alertes sur UNE connexion SMTP partagée.
+
+    items : liste de [device_id, title, message, severity].
+    Utilisée par les tâches périodiques (check_offline_devices) qui
+    peuvent produire des dizaines d'alertes d'un coup : un handshake
+    SMTP pour tout le lot au lieu d'un par équipement.
+    """
+    from django.conf import settings
+    from django.core.mail import EmailMessage, get_connection
+
+    from apps.devices.models import Device
+
+    # Une seule requête pour résoudre tous les emails des responsables
+    owner_emails = {
+        str(device_id): email
+        for device_id, email in Device.objects.filter(
+            pk__in=[item[0] for item in items]
+        ).values_list('id', 'owner__email')
+    }
+
+    messages = [
+        EmailMessage(
+            subject    = f"[ElectroSecure] {title}",
+            body       = message,
+            from_email = settings.DEFAULT_FROM_EMAIL,
+            to         = [owner_emails[device_id]],
+        )
+        for device_id, title, message, severity in items
+        if owner_emails.get(device_id)
+    ]
+    if not messages:
+        return
+
+    try:
+        with get_connection() as conn:
+            conn.send_messages(messages)
+    except Exception as exc:
+        logger.warning("[TASK] send_notification_batch retry : %s", exc)
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=1)
+def scan_device_task(self, device_id):
+    """
+    Scan complet d'UN équipement — unité de fan-out du scan nocturne.
+
+    Ne reçoit que l'id : la ligne est rechargée côté worker avec les
+    seules colonnes que les scans et leurs alertes consomment.
+    """
+    from apps.devices.models import Device
+    from apps.devices.services.scan_service import ScanService
+
+    try:
+        device = Device.objects.only(
+            'id', 'reference', 'ip_address', 'os',
+            'device_type', 'status', 'owner',
+        ).get(pk=device_id)
+    except Device.DoesNotExist:
+        return {'scanned': False}  # Équipement supprimé entre-temps
+
+    try:
+        ScanService().run_full_scan(device)
+        return {'scanned': True}
+    except Exception as e:
+        logger.warning(
+            "[TASK] Scan échoué pour %s : %s",
+            device.reference, e
+        )
+        return {'scanned': False}
+
+
 @shared_task(bind=True, max_retries=1)
 def run_nightly_security_scan(self):
     """
     Scan de sécurité complet sur tous les équipements supervisés.
     Ports + vulnérabilités CVE.
 
+    Distribue un scan_device_task par équipement via group() : le parc
+    se répartit sur tous les workers disponibles et un équipement lent
+    ne bloque pas le reste de la nuit.
+
     Planification : toutes les nuits à 2h00 (voir config/celery.py)
     """
+    from celery import group
+
     from apps.devices.models import Device
-    from apps.devices.services.scan_service import ScanService
 
     try:
-        devices = Device.objects.filter(
-            is_monitored=True,
-            is_active=True,
-            is_deleted=False,
-        )
-        scan_service = ScanService()
-        scanned = 0
-
-        for device in devices:
-            try:
-                scan_service.run_full_scan(device)
-                scanned += 1
-            except Exception as e:
-                logger.warning(
-                    "[TASK] Scan échoué pour %s : %s",
-                    device.reference, e
-                )
+        # Seuls les ids traversent le broker
+        device_ids = [
+            str(pk)
+            for pk in Device.objects.filter(
+                is_monitored=True,
+                is_active=True,
+                is_deleted=False,
+            ).values_list('id', flat=True).iterator(chunk_size=1000)
+        ]
+
+        if device_ids:
+            group(
+                scan_device_task.s(device_id) for device_id in device_ids
+            ).apply_async()
 
         logger.info(
-            "[TASK] run_nightly_security_scan : %d/%d équipements scannés",
-            scanned, devices.count()
+            "[TASK] run_nightly_security_scan : %d scan(s) distribué(s)",
+            len(device_ids)
         )
-        return {'total': devices.count(), 'scanned': scanned}
+        return {'dispatched': len(device_ids)}
 
     except Exception as exc:
         logger.error("[TASK] run_nightly_security_scan ERREUR : %s", exc)
@@ -6,7 +6,9 @@ from django.test import TestCase
 from unittest.mock import MagicMock, patch
 
 from apps.devices.services.scan_service import ScanService
-from apps.devices.models import DeviceVulnerability
+from apps.devices.models import (
+    Device, DevicePort, DeviceVulnerability, _bump_device_counter,
+)
 
 
 class CvssScoreTest(TestCase):
@@ -140,4 +142,157 @@ class AlertServiceTest(TestCase):
         """check_unscanned_devices retourne une liste."""
         from apps.devices.services.alert_service import AlertService
         result = AlertService.check_unscanned_devices(days=7)
-        self.assertIsInstance(result, list)
\ No newline at end of file
+        self.assertIsInstance(result, list)
+
+
+class DeviceCounterTest(TestCase):
+    """
+    Tests des compteurs dénormalisés de Device.
+
+    open_vulnerabilities_count et unauthorized_ports_count sont
+    entretenus par deltas atomiques dans save()/delete() et resynchronisés
+    après les bulk_create des scans : la matrice de transitions ci-dessous
+    fige ce que toute évolution future doit préserver.
+    """
+
+    def setUp(self):
+        self.device = Device.objects.create(
+            reference   = 'DEV-0001',
+            name        = 'Serveur test',
+            device_type = 'server',
+            ip_address  = '192.168.1.10',
+        )
+
+    def _vulns(self):
+        return Device.objects.values_list(
+            'open_vulnerabilities_count', flat=True
+        ).get(pk=self.device.pk)
+
+    def _ports(self):
+        return Device.objects.values_list(
+            'unauthorized_ports_count', flat=True
+        ).get(pk=self.device.pk)
+
+    def _vuln(self, cve_id, status):
+        return DeviceVulnerability.objects.create(
+            device     = self.device,
+            cve_id     = cve_id,
+            cvss_score = 9.8,
+            severity   = DeviceVulnerability.SEVERITY_CRITICAL,
+            status     = status,
+            title      = 'Vulnérabilité de test',
+        )
+
+    def _port(self, number, state=DevicePort.STATE_OPEN, authorized=False):
+        return DevicePort.objects.create(
+            device        = self.device,
+            port_number   = number,
+            protocol      = 'tcp',
+            state         = state,
+            service       = 'test',
+            is_authorized = authorized,
+        )
+
+    # ---- Vulnérabilités : matrice de transitions --------------
+
+    def test_vuln_create_open_increments(self):
+        self._vuln('CVE-2024-0001', DeviceVulnerability.STATUS_OPEN)
+        self.assertEqual(self._vulns(), 1)
+
+    def test_vuln_create_in_progress_counts(self):
+        """IN_PROGRESS compte comme ouverte (travail en cours)."""
+        self._vuln('CVE-2024-0001', DeviceVulnerability.STATUS_IN_PROGRESS)
+        self.assertEqual(self._vulns(), 1)
+
+    def test_vuln_create_patched_does_not_count(self):
+        self._vuln('CVE-2024-0001', DeviceVulnerability.STATUS_PATCHED)
+        self.assertEqual(self._vulns(), 0)
+
+    def test_vuln_open_to_in_progress_no_change(self):
+        """Transition entre deux statuts comptés : delta nul."""
+        vuln = self._vuln('CVE-2024-0001', DeviceVulnerability.STATUS_OPEN)
+        vuln.status = DeviceVulnerability.STATUS_IN_PROGRESS
+        vuln.save(update_fields=['status'])
+        self.assertEqual(self._vulns(), 1)
+
+    def test_vuln_in_progress_to_patched_decrements(self):
+        vuln = self._vuln('CVE-2024-0001', DeviceVulnerability.STATUS_IN_PROGRESS)
+        vuln.status = DeviceVulnerability.STATUS_PATCHED
+        vuln.save(update_fields=['status'])
+        self.assertEqual(self._vulns(), 0)
+
+    def test_vuln_patched_to_open_increments(self):
+        """Régression (réouverture) : le compteur remonte."""
+        vuln = self._vuln('CVE-2024-0001', DeviceVulnerability.STATUS_PATCHED)
+        vuln.status = DeviceVulnerability.STATUS_OPEN
+        vuln.save(update_fields=['status'])
+        self.assertEqual(self._vulns(), 1)
+
+    def test_vuln_delete_open_decrements(self):
+        vuln = self._vuln('CVE-2024-0001', DeviceVulnerability.STATUS_OPEN)
+        vuln.delete()
+        self.assertEqual(self._vulns(), 0)
+
+    def test_vuln_delete_patched_no_change(self):
+        self._vuln('CVE-2024-0001', DeviceVulnerability.STATUS_OPEN)
+        patched = self._vuln('CVE-2024-0002', DeviceVulnerability.STATUS_PATCHED)
+        patched.delete()
+        self.assertEqual(self._vulns(), 1)
+
+    # ---- Ports : matrice de transitions -----------------------
+
+    def test_port_create_open_unauthorized_increments(self):
+        self._port(23, authorized=False)
+        self.assertEqual(self._ports(), 1)
+
+    def test_port_create_open_authorized_does_not_count(self):
+        self._port(22, authorized=True)
+        self.assertEqual(self._ports(), 0)
+
+    def test_port_create_closed_unauthorized_does_not_count(self):
+        """Seuls les ports OUVERTS non autorisés comptent."""
+        self._port(23, state=DevicePort.STATE_CLOSED, authorized=False)
+        self.assertEqual(self._ports(), 0)
+
+    def test_port_authorize_decrements(self):
+        port = self._port(8080, authorized=False)
+        port.is_authorized = True
+        port.save(update_fields=['is_authorized'])
+        self.assertEqual(self._ports(), 0)
+
+    def test_port_close_decrements(self):
+        port = self._port(23, authorized=False)
+        port.state = DevicePort.STATE_CLOSED
+        port.save(update_fields=['state'])
+        self.assertEqual(self._ports(), 0)
+
+    def test_port_delete_unauthorized_decrements(self):
+        port = self._port(23, authorized=False)
+        port.delete()
+        self.assertEqual(self._ports(), 0)
+
+    # ---- Garde-fous et resynchronisation ----------------------
+
+    def test_bump_clamps_at_zero(self):
+        """Un delta négatif sur compteur nul plafonne à 0 (pas de CHECK)."""
+        _bump_device_counter(self.device.pk, 'open_vulnerabilities_count', -5)
+        self.assertEqual(self._vulns(), 0)
+
+    def test_port_counter_resynced_after_rescan_upsert(self):
+        """
+        run_port_scan passe par bulk_create (pas de save() par ligne) :
+        le compteur doit refléter l'état réel après deux scans successifs.
+        """
+        discovered = [(22, 'tcp'), (443, 'tcp'), (23, 'tcp'), (4444, 'tcp')]
+        with patch.object(ScanService, '_discover_ports', return_value=discovered):
+            service = ScanService()
+            service.run_port_scan(self.device)
+            # 23 et 4444 ne sont pas autorisés pour un 'server'
+            self.assertEqual(self._ports(), 2)
+            # Rescan identique : chemin "inchangé" (bump last_seen seul)
+            service.run_port_scan(self.device)
+            self.assertEqual(self._ports(), 2)
+        expected = DevicePort.objects.filter(
+            device=self.device, state=DevicePort.STATE_OPEN, is_authorized=False
+        ).count()
+        self.assertEqual(self._ports(), expected)
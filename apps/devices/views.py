@@ -2,12 +2,18 @@
 Vues de l'application Devices.
 """
 
+import hashlib
+
+from django.db.models import Count, Max, Q, Sum
+from django.http import HttpResponseNotModified
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
+from core.constants import DEVICE_STATUS_ONLINE
 from core.permissions import IsEngineerOrReadOnly, IsEngineerOrAbove
 from core.mixins import AuditMixin
 from core.exceptions import ConflictError, BusinessLogicError
@@ -48,11 +54,15 @@ class DeviceViewSet(AuditMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsEngineerOrReadOnly]
 
     def get_queryset(self):
-        qs = Device.objects.filter(
-            is_deleted=False
-        ).select_related('owner').prefetch_related(
-            'ports', 'vulnerabilities', 'scans'
-        )
+        qs = Device.objects.filter(is_deleted=False)
+
+        # Chaque serializer déclare lui-même ce qu'il consomme :
+        # la liste restreint les colonnes (only + annotation), le
+        # détail précharge les relations (select/prefetch_related)
+        if self.action == 'list':
+            qs = DeviceListSerializer.setup_eager_loading(qs)
+        else:
+            qs = DeviceDetailSerializer.setup_eager_loading(qs)
 
         # Filtres
         device_type = self.request.query_params.get('type')
@@ -76,6 +86,51 @@ class DeviceViewSet(AuditMixin, viewsets.ModelViewSet):
             return DeviceListSerializer
         return DeviceDetailSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Liste avec réponse conditionnelle : les tableaux de bord sondent
+        cet endpoint en continu. L'ETag dérive d'un agrégat couvrant
+        chaque colonne servie qui évolue par UPDATE ciblé sans toucher
+        updated_at : compteurs dénormalisés, last_seen (scans ping) et
+        statut (le sweep offline et les pings changent status sans
+        bouger ni updated_at ni last_seen — le terme online/offline
+        capture ces bascules) et le compte de vulnérabilités critiques
+        ouvertes (servi par ligne, mais invisible du compteur
+        dénormalisé qui agrège OPEN + IN_PROGRESS toutes sévérités).
+        Quand rien n'a bougé, un 304 évite le chargement et la
+        sérialisation de centaines de lignes.
+        """
+        agg = Device.objects.filter(is_deleted=False).aggregate(
+            last_change=Max('updated_at'),
+            last_seen  =Max('last_seen'),
+            total      =Count('id'),
+            online     =Count('id', filter=Q(status=DEVICE_STATUS_ONLINE)),
+            vulns      =Sum('open_vulnerabilities_count'),
+            ports      =Sum('unauthorized_ports_count'),
+        )
+        vuln_agg = DeviceVulnerability.objects.aggregate(
+            changed=Max('updated_at'),
+            crit   =Count('id', filter=Q(
+                severity=DeviceVulnerability.SEVERITY_CRITICAL,
+                status  =DeviceVulnerability.STATUS_OPEN,
+            )),
+        )
+        fingerprint = (
+            '{last_change}|{last_seen}|{total}|{online}|{vulns}|{ports}'
+            .format(**agg)
+            + '|{changed}|{crit}'.format(**vuln_agg)
+        )
+        etag = f'"{hashlib.blake2b(fingerprint.encode(), digest_size=8).hexdigest()}"'
+
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        response['ETag']          = etag
+        response['Cache-Control'] = 'private, max-age=5'
+        return response
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -173,7 +228,8 @@ class DeviceViewSet(AuditMixin, viewsets.ModelViewSet):
     def vulnerabilities(self, request, pk=None):
         """GET /{id}/vulnerabilities/ — Liste les CVE de l'équipement."""
         device  = self.get_object()
-        qs      = device.vulnerabilities.order_by('-cvss_score')
+        qs      = device.vulnerabilities.select_related('patched_by') \
+                                        .order_by('-cvss_score')
 
         # Filtre optionnel par statut
         vuln_status = request.query_params.get('status')
@@ -223,7 +279,8 @@ class DeviceViewSet(AuditMixin, viewsets.ModelViewSet):
     def scans(self, request, pk=None):
         """GET /{id}/scans/ — Historique des scans de l'équipement."""
         device = self.get_object()
-        scans  = device.scans.order_by('-started_at')[:20]
+        scans  = device.scans.select_related('launched_by') \
+                             .order_by('-started_at')[:20]
         return Response(DeviceScanSerializer(scans, many=True).data)
 
 
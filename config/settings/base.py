@@ -99,6 +99,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME'  : BASE_DIR / 'db.sqlite3',
+        # Réutiliser la connexion entre les requêtes plutôt que d'en
+        # rouvrir une à chaque fois (gratuit sur SQLite, indispensable
+        # le jour où on passe sur un serveur de BDD).
+        # 600 s : aligné sur conn_max_age de production.py
+        'CONN_MAX_AGE'       : 600,
+        'CONN_HEALTH_CHECKS' : True,
     }
 }
 
@@ -126,6 +132,12 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL        = '/media/'
 MEDIA_ROOT       = BASE_DIR / 'media'
 
+# Refuser les uploads trop gros dès le parseur HTTP (RequestDataTooBig),
+# avant que le corps soit entièrement bufferisé — la limite de 2 MB du
+# serializer d'avatar reste en défense en profondeur
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
+
 # ── Django REST Framework ─────────────────────────────────────
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -154,8 +166,12 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS'  : True,
     'BLACKLIST_AFTER_ROTATION': True,
     'ALGORITHM'              : 'HS256',
+    # Clé explicite + pas de JWKS distant : le backend est résolu une fois
+    # au démarrage, aucune indirection réseau possible à la signature
+    'SIGNING_KEY'            : SECRET_KEY,
+    'JWK_URL'                : None,
     'AUTH_HEADER_TYPES'      : ('Bearer',),
-    'USER_ID_FIELD'          : 'id',
+    'USER_ID_FIELD'          : 'public_id',  # UUID exposé, jamais la PK interne
     'USER_ID_CLAIM'          : 'user_id',
 }
 
@@ -197,6 +213,12 @@ CELERY_TASK_SERIALIZER   = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE          = TIME_ZONE
 
+# Les notifications partent sur une file dédiée : un pic d'alertes
+# ne retarde pas les scans ni la maintenance
+CELERY_TASK_ROUTES = {
+    'apps.devices.tasks.send_notification_task': {'queue': 'alerts'},
+}
+
 # ── Sécurité des sessions ─────────────────────────────────────
 SESSION_COOKIE_HTTPONLY = True
 CSRF_COOKIE_HTTPONLY    = True
@@ -35,16 +35,19 @@ GENERIC_STATUS_CHOICES = [
 # RÔLES UTILISATEURS
 # ============================================================
 
-ROLE_ADMIN      = 'admin'
-ROLE_ENGINEER   = 'engineer'
-ROLE_TECHNICIAN = 'technician'
-ROLE_VIEWER     = 'viewer'
+# Entiers ordonnés par niveau de privilège : les contrôles de permission
+# se font par simple comparaison (role >= ROLE_ENGINEER) et la colonne
+# occupe 2 octets au lieu d'un varchar(20) dans chaque jointure
+ROLE_VIEWER     = 0
+ROLE_TECHNICIAN = 1
+ROLE_ENGINEER   = 2
+ROLE_ADMIN      = 3
 
 USER_ROLE_CHOICES = [
-    (ROLE_ADMIN,      'Administrateur'),
-    (ROLE_ENGINEER,   'Ingénieur'),
-    (ROLE_TECHNICIAN, 'Technicien'),
     (ROLE_VIEWER,     'Lecteur'),
+    (ROLE_TECHNICIAN, 'Technicien'),
+    (ROLE_ENGINEER,   'Ingénieur'),
+    (ROLE_ADMIN,      'Administrateur'),
 ]
 
 
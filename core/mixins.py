@@ -19,6 +19,8 @@ Usage :
         # is_active + méthodes activate/deactivate() (ActivableMixin)
 """
 
+import copy
+
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
@@ -229,6 +231,72 @@ class OwnerMixin(models.Model):
 # MIXIN POUR L'API REST (Serializer)
 # ============================================================
 
+class CachedFieldsMixin:
+    """
+    Mixin pour les Serializers DRF.
+    Met en cache la construction des champs par classe de serializer.
+
+    get_fields() de ModelSerializer ré-introspecte le modèle (Meta,
+    relations, validateurs) à CHAQUE instanciation — un coût de
+    réflexion payé sur toutes les requêtes. On ne le paie qu'une fois
+    par classe, puis on retourne une copie superficielle des champs
+    (les Field DRF ne portent pas d'état avant bind()).
+
+    Usage :
+        class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+            ...
+    """
+
+    def get_fields(self):
+        cls = type(self)
+        cached = cls.__dict__.get('_cached_fields')
+        if cached is None:
+            cached = super().get_fields()
+            cls._cached_fields = cached
+        return {name: copy.deepcopy(field) for name, field in cached.items()}
+
+
+class ChoiceLabelsMixin:
+    """
+    Mixin pour les Serializers DRF.
+    Injecte les libellés des champs à choix via des dicts précalculés.
+
+    Chaque `CharField(source='get_x_display')` passe par le proxy
+    `_get_FIELD_display` de Django, qui retraverse les flatchoices du
+    champ pour chaque ligne sérialisée. Ici les dicts {valeur: libellé}
+    sont résolus une seule fois par classe ; to_representation ne fait
+    plus qu'une recherche de dict par champ et par ligne.
+
+    Usage :
+        class DevicePortSerializer(ChoiceLabelsMixin, ModelSerializer):
+            choice_label_fields = ('state', 'protocol')
+        # ajoute 'state_label' et 'protocol_label' à la sortie
+    """
+
+    choice_label_fields = ()
+
+    @classmethod
+    def _label_maps(cls):
+        maps = cls.__dict__.get('_cached_label_maps')
+        if maps is None:
+            model = cls.Meta.model
+            maps  = tuple(
+                (attr, f'{attr}_label',
+                 dict(model._meta.get_field(attr).flatchoices))
+                for attr in cls.choice_label_fields
+            )
+            cls._cached_label_maps = maps
+        return maps
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for attr, out_key, labels in self._label_maps():
+            value = getattr(instance, attr)
+            # Même repli que get_FOO_display : la valeur brute
+            data[out_key] = labels.get(value, value)
+        return data
+
+
 class ReadOnlyFieldsMixin:
     """
     Mixin pour les Serializers DRF.
@@ -18,6 +18,7 @@ from core.utils import (
     format_duration,
     truncate_text,
     mask_sensitive_data,
+    uuid7,
 )
 
 
@@ -45,6 +46,29 @@ class GenerateUniqueCodeTest(TestCase):
         self.assertNotEqual(code1, code2)
 
 
+class Uuid7Test(TestCase):
+
+    def test_version_is_7(self):
+        """L'UUID généré porte bien la version 7."""
+        self.assertEqual(uuid7().version, 7)
+
+    def test_variant_is_rfc(self):
+        """La variante est celle de la RFC 4122/9562."""
+        import uuid as uuid_module
+        self.assertEqual(uuid7().variant, uuid_module.RFC_4122)
+
+    def test_values_are_time_ordered(self):
+        """Deux UUID générés à la suite sont croissants."""
+        first  = uuid7()
+        second = uuid7()
+        self.assertLessEqual(first.int >> 80, second.int >> 80)
+
+    def test_values_are_unique(self):
+        """Pas de collision sur un petit lot."""
+        batch = {uuid7() for _ in range(100)}
+        self.assertEqual(len(batch), 100)
+
+
 class GenerateReferenceTest(TestCase):
 
     def test_format_is_correct(self):
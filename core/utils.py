@@ -16,6 +16,7 @@ import random
 import string
 import hashlib
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 
@@ -43,6 +44,30 @@ def generate_unique_code(prefix: str = '', length: int = 8) -> str:
     return f"{prefix}{random_part}"
 
 
+def uuid7() -> uuid.UUID:
+    """
+    Génère un UUID version 7 (RFC 9562) : 48 bits de timestamp
+    milliseconde en tête, puis de l'aléatoire.
+
+    Contrairement à uuid4, les valeurs successives sont croissantes :
+    les insertions arrivent en fin d'index B-tree unique au lieu de
+    provoquer des éclatements de pages aléatoires sous forte ingestion.
+    (À remplacer par uuid.uuid7 de la stdlib quand Python le fournira.)
+
+    Usage :
+        DeviceVulnerability(instance_id=uuid7())
+    """
+    import secrets
+    import time
+
+    value  = (time.time_ns() // 1_000_000 & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76                     # version 7
+    value |= secrets.randbits(12) << 64    # rand_a
+    value |= 0b10 << 62                    # variante RFC 4122/9562
+    value |= secrets.randbits(62)          # rand_b
+    return uuid.UUID(int=value)
+
+
 def generate_reference(category: str, sequence: int) -> str:
     """
     Génère une référence formatée pour les équipements électriques.
@@ -256,6 +281,26 @@ def truncate_text(text: str, max_length: int = 100, suffix: str = '...') -> str:
     return text[:max_length - len(suffix)] + suffix
 
 
+# ============================================================
+# NORMALISATION
+# ============================================================
+
+@lru_cache(maxsize=4096)
+def normalize_email(email: str) -> str:
+    """
+    Normalise une adresse email (minuscules, espaces retirés).
+
+    Memoïzé : le trafic de bots martèle souvent les mêmes adresses au
+    login, inutile de réallouer la même chaîne normalisée à chaque
+    appel. Seule la forme normalisée est conservée en cache.
+
+    Usage :
+        normalize_email('  John.Doe@EDF.FR ')
+        # → 'john.doe@edf.fr'
+    """
+    return (email or '').strip().lower()
+
+
 # ============================================================
 # SÉCURITÉ
 # ============================================================